@@ -18,7 +18,6 @@ if getattr(sys, 'frozen', False):
 os.environ['PLAYWRIGHT_SKIP_BROWSER_DOWNLOAD'] = '1'
 
 # Now safe to import other modules
-import json
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -36,8 +35,9 @@ def get_input_file_path():
 def load_and_display_config(input_path):
     """Load and display config from input.json"""
     try:
-        with open(input_path, 'r', encoding='utf-8') as f:
-            config = json.load(f)
+        # Validate the whole file up front (schema + business rules) before any browser starts
+        from src.features.csp.csp_config import load_input_config
+        config = load_input_config(input_path).model_dump()
 
         users = config.get('users', [])
         admin = config.get('admin_credentials', {}).get('username', 'N/A')
@@ -50,14 +50,14 @@ def load_and_display_config(input_path):
             print(f"\n📋 User list:")
             for i, user in enumerate(users, 1):
                 target = user.get('target_user', 'Unknown')
-                role = user.get('new_role', 'No change')
-                branch = user.get('branch_hierarchy', [])
+                role = user.get('new_role') or 'No change'
+                branch = user.get('branch_hierarchy') or []
                 branch_code = branch[-1] if branch else 'N/A'
                 print(f"   {i}. {target} → Branch: {branch_code} | Role: {role}")
 
         return True
-    except json.JSONDecodeError as e:
-        print(f"\n❌ Invalid JSON: {e}")
+    except ValueError as e:
+        print(f"\n❌ Invalid config: {e}")
         return False
     except Exception as e:
         print(f"\n❌ Error loading config: {e}")
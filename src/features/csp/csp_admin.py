@@ -1,28 +1,90 @@
-import json
 import sys
 from pathlib import Path
 from datetime import datetime
+from typing import Callable
 from dotenv import load_dotenv
 import time
+import atexit
 
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 from src.shared.nova_manager import NovaManager
 from src.shared.logger import setup_automation_logger
 from src.shared.screenshot_utils import ScreenshotManager
-from src.shared.handler_wrapper import HandlerWrapper
+from src.shared.handler_wrapper import HandlerWrapper, StepFailedError
+from src.shared.results_writer import ResultsWriter
+from src.shared.completed_users import CompletedUsersCache, user_fingerprint
 
-from src.features.csp.handlers.csp_login_handler import CSPLoginHandler
-from src.features.csp.handlers.csp_user_search_handler import CSPUserSearchHandler
-from src.features.csp.handlers.csp_role_handler import CSPRoleHandler
-from src.features.csp.handlers.csp_branch_handler import CSPBranchHandler
-from src.features.csp.handlers.csp_save_handler import CSPSaveHandler
+from src.features.csp.csp_config import load_input_config
+from src.features.csp.csp_user_steps import apply_user_changes, CHANGE_STATUS
+from src.features.csp.handlers.csp_login_handler import CSPLoginHandler, is_logged_in
 
 load_dotenv()
 
+# Browser session shared by consecutive users of one run
+_session_state = {
+    'nova': None,
+    'logged_in': False,
+    'sessions_started': 0,
+    'handlers': {},
+}
+
+
+def _get_session_nova(admin_creds: dict, execution_id: str, block_assets: bool = False):
+    """Return the run's NovaAct session, starting a new one if none is open."""
+    if _session_state['nova'] is not None:
+        return _session_state['nova']
+
+    _session_state['sessions_started'] += 1
+    nova = NovaManager.start_with_retry(lambda: NovaManager.create_for_automation(
+        automation_name="csp_admin",
+        starting_page=admin_creds['csp_admin_url'],
+        execution_id=f"{execution_id}_session{_session_state['sessions_started']}"
+    ))
+
+    if block_assets:
+        NovaManager.block_resources(nova)
+
+    _session_state['nova'] = nova
+    _session_state['logged_in'] = False
+    _session_state['handlers'] = {}
+    return nova
+
+
+def _stop_session_nova():
+    """Stop the run's NovaAct session (if any) so the next user starts fresh."""
+    nova = _session_state['nova']
+    _session_state['nova'] = None
+    _session_state['logged_in'] = False
+    _session_state['handlers'] = {}
+
+    if nova:
+        try:
+            nova.stop()
+        except Exception:
+            pass
+
+
+# The browser stays open between users; make sure it closes on Ctrl+C too
+atexit.register(_stop_session_nova)
+
+
+def _get_session_handler(nova, handler_cls):
+    """
+    Return a handler_cls instance bound to nova, reused while the session lives.
+
+    Handlers only hold the session's page and locators, so consecutive users
+    on the same session share one instance.
+    """
+    handlers = _session_state['handlers']
+    handler = handlers.get(handler_cls)
+    if handler is None or handler.nova is not nova:
+        handler = handlers[handler_cls] = handler_cls(nova)
+    return handler
+
 
 def process_user(
-    nova,
+    get_nova: Callable,
     admin_username: str,
     admin_password: str,
     target_user: str,
@@ -30,8 +92,17 @@ def process_user(
     branch_hierarchy: list = None,
     screenshot_manager = None,
     logger = None,
-    execution_id: str = None
+    execution_id: str = None,
+    session_state_ttl_sec: int = 0,
+    resume_url: str = None
 ) -> dict:
+    """
+    Run all steps for one user on the run's NovaAct session.
+
+    get_nova returns the open session, starting one if needed. If resume_url
+    is given the session is already logged in: navigate there instead of
+    logging in again.
+    """
 
     wrapper = HandlerWrapper()
 
@@ -40,104 +111,77 @@ def process_user(
     print(f"👤 Processing user: {target_user}")
     print(f"{'='*60}")
 
-    result = {'success': False}
-    has_changes = False  # Track if any changes were made
+    failed_steps = []
+    error = None
 
     try:
-        # Step 1: Login
-        login_handler = CSPLoginHandler(nova, screenshot_manager=screenshot_manager)
-        success = wrapper.execute_with_retry(
-            step_name="login",
-            handler_func=login_handler.login,
-            max_retries=5,
-            username=admin_username,
-            password=admin_password
-        )
-        if not success:
-            result['failed_steps'].append("login")
-            return result
-
-        # Step 2: Search user
-        search_handler = CSPUserSearchHandler(nova)
-        success = wrapper.execute_with_retry(
-            step_name="search_user",
-            handler_func=search_handler.search_and_open_edit,
-            max_retries=5,
-            target_user=target_user
-        )
-        if not success:
-            result['failed_steps'].append("search_user")
-            return result
-
-        # Screenshot after opening edit
-        if screenshot_manager:
-            screenshot_manager.capture(nova, step_name="edit_form_opened")
-
-        # Step 3: Change role (optional)
-        if new_role:
-            role_handler = CSPRoleHandler(nova)
-            success = wrapper.execute_with_retry(
-                step_name="change_role",
-                handler_func=role_handler.change_role,
-                max_retries=5,
-                new_role=new_role
+        try:
+            nova = get_nova()
+        except Exception as e:
+            raise StepFailedError("start_session", f"Failed to start Nova session: {e}")
+
+        if resume_url:
+            # Reused session: back to the user list instead of logging in again
+            logger.info("Reusing logged-in session")
+            nova.page.goto(resume_url)
+            if not is_logged_in(nova.page):
+                # Session expired mid-run: fall back to a fresh login
+                logger.info("Reused session is no longer logged in")
+                print("🔐 Session expired, logging in again...")
+                _session_state['logged_in'] = False
+                resume_url = None
+
+        if not resume_url:
+            # Step 1: Login
+            login_handler = CSPLoginHandler(
+                nova,
+                screenshot_manager=screenshot_manager,
+                session_state_ttl_sec=session_state_ttl_sec
             )
-            if not success:
-                result['failed_steps'].append("change_role")
-                return result
-            # Track changes
-            if role_handler.has_changes:
-                has_changes = True
-
-        # Step 4: Change branch (optional)
-        if branch_hierarchy:
-            branch_handler = CSPBranchHandler(nova)
             success = wrapper.execute_with_retry(
-                step_name="change_branch",
-                handler_func=branch_handler.change_branch_hierarchical,
+                step_name="login",
+                handler_func=login_handler.login,
                 max_retries=5,
-                branch_hierarchy=branch_hierarchy
+                username=admin_username,
+                password=admin_password
             )
             if not success:
-                result['failed_steps'].append("change_branch")
-                return result
-            # Track changes
-            if branch_handler.has_changes:
-                has_changes = True
-
-        # Step 5: Save changes only if there were changes
-        if has_changes:
-            # Screenshot before save
-            if screenshot_manager:
-                screenshot_manager.capture(nova, step_name="before_save")
-
-            save_handler = CSPSaveHandler(nova)
-            success = wrapper.execute_with_retry(
-                step_name="save_changes",
-                handler_func=save_handler.save_changes,
-                max_retries=3
-            )
-            if not success:
-                result['failed_steps'].append("save_changes")
-                return result
-
-            # Screenshot after save
-            if screenshot_manager:
-                screenshot_manager.capture(nova, step_name="after_save")
-        else:
-            logger.info("No changes detected. Skipping save.")
-            print("\nℹ️  No changes detected. Skipping save.")
+                raise StepFailedError("login")
+
+        # Steps 2-5: Search, change role/branch, save
+        changes = apply_user_changes(
+            nova,
+            lambda handler_cls: _get_session_handler(nova, handler_cls),
+            target_user,
+            new_role=new_role,
+            branch_hierarchy=branch_hierarchy,
+            screenshot_manager=screenshot_manager,
+            logger=logger,
+            max_retries=5
+        )
 
         # Success
-        result['success'] = True
-        logger.info(f"Successfully processed {target_user}")
-        print(f"\n✅ Successfully processed {target_user}")
+        logger.info(f"Successfully processed {target_user} - {CHANGE_STATUS[changes]}")
+        print(f"\n✅ Successfully processed {target_user} - {CHANGE_STATUS[changes]}")
+
+    except StepFailedError as e:
+        failed_steps.append(e.step_name)
+        error = str(e)
+        logger.error(f"Error processing {target_user}: {error}")
+        print(f"\n❌ Error: {error}")
 
     except Exception as e:
+        error = str(e)
         logger.error(f"Error processing {target_user}: {e}")
         print(f"\n❌ Error: {e}")
 
-    return result
+    # Single exit point: one result per user
+    return {
+        'success': error is None,
+        'failed_steps': failed_steps,
+        'error': error,
+        'timestamp': datetime.now().isoformat(sep=' ', timespec='seconds')
+    }
 
 
 def process_single_user(
@@ -145,7 +189,10 @@ def process_single_user(
     user_config: dict,
     execution_id: str,
     logger,
-    user_index: int = 1
+    user_index: int = 1,
+    block_assets: bool = False,
+    session_state_ttl_sec: int = 0,
+    screenshots: bool = True
 ) -> dict:
     """Process a single user and return result"""
     user_id = user_config['target_user']
@@ -157,50 +204,35 @@ def process_single_user(
     screenshot_manager = ScreenshotManager(
         base_dir="screenshots",
         execution_id=user_execution_id
-    )
-
-    # Create Nova instance
-    nova = None
-    result = {'success': False, 'user': user_id}
+    ) if screenshots else None
 
-    try:
+    if _session_state['nova'] is None:
         logger.info(f"Creating Nova session for {user_id}")
-        nova = NovaManager.create_for_automation(
-            automation_name="csp_admin",
-            starting_page=admin_creds['csp_admin_url'],
-            execution_id=user_execution_id
-        )
-        nova.start()
-        logger.info("Nova session started")
-
-        # Process user
-        result = process_user(
-            nova=nova,
-            admin_username=admin_creds['username'],
-            admin_password=admin_creds['password'],
-            target_user=user_id,
-            new_role=user_config.get('new_role'),
-            branch_hierarchy=user_config.get('branch_hierarchy'),
-            screenshot_manager=screenshot_manager,
-            logger=logger,
-            execution_id=execution_id
-        )
-        result['user'] = user_id
-
-    except Exception as e:
-        logger.error(f"Error with user {user_id}: {e}")
-        print(f"\n❌ Error: {e}")
-        result['success'] = False
-        result['error'] = str(e)
+    resume_url = admin_creds['csp_admin_url'] if _session_state['logged_in'] else None
+
+    # Process user (session start failures come back as a failed result too)
+    result = process_user(
+        get_nova=lambda: _get_session_nova(admin_creds, execution_id, block_assets),
+        admin_username=admin_creds['username'],
+        admin_password=admin_creds['password'],
+        target_user=user_id,
+        new_role=user_config.get('new_role'),
+        branch_hierarchy=user_config.get('branch_hierarchy'),
+        screenshot_manager=screenshot_manager,
+        logger=logger,
+        execution_id=execution_id,
+        session_state_ttl_sec=session_state_ttl_sec,
+        resume_url=resume_url
+    )
+    result['user'] = user_id
 
-    finally:
-        # Stop Nova session
-        if nova:
-            try:
-                nova.stop()
-                logger.info("Nova session stopped")
-            except:
-                pass
+    if result['success']:
+        # Keep the logged-in session for the next user
+        _session_state['logged_in'] = True
+    else:
+        # Page state is unknown after a failure - start the next user on a fresh session
+        _stop_session_nova()
+        logger.info("Nova session stopped")
 
     return result
 
@@ -208,8 +240,22 @@ def process_single_user(
 def main(
     input_file: str = None,
     url: str = None,
-    execution_id: str = None
+    execution_id: str = None,
+    block_assets: bool = False,
+    session_state_ttl_sec: int = 0,
+    skip_completed_ttl_sec: int = 0,
+    auto_continue: bool = False,
+    auto_retry: int = 0,
+    screenshots: bool = True
 ):
+    # Validate arguments before loading anything or starting browsers
+    if not isinstance(session_state_ttl_sec, int) or session_state_ttl_sec < 0:
+        raise ValueError(f"session_state_ttl_sec must be >= 0, got {session_state_ttl_sec!r}")
+    if not isinstance(skip_completed_ttl_sec, int) or skip_completed_ttl_sec < 0:
+        raise ValueError(f"skip_completed_ttl_sec must be >= 0, got {skip_completed_ttl_sec!r}")
+    if not isinstance(auto_retry, int) or auto_retry < 0:
+        raise ValueError(f"auto_retry must be >= 0, got {auto_retry!r}")
+
     # Generate execution ID
     if not execution_id:
         execution_id = datetime.now().strftime('%Y%m%d_%H%M%S')
@@ -217,7 +263,7 @@ def main(
     # Setup logger
     logger = setup_automation_logger("csp_admin", execution_id)
     logger.info("Starting CSP Admin automation")
-    print("🚀 CSP Admin Automation - Interactive Mode")
+    print(f"🚀 CSP Admin Automation - {'Auto' if auto_continue else 'Interactive'} Mode")
     print("="*60)
 
     # Default input file
@@ -228,8 +274,7 @@ def main(
     logger.info(f"Loading config from: {input_file}")
     print(f"📂 Loading config from: {input_file}")
 
-    with open(input_file) as f:
-        config = json.load(f)
+    config = load_input_config(input_file).model_dump()
 
     admin_creds = config['admin_credentials']
     users = config['users']
@@ -244,79 +289,94 @@ def main(
     print(f"👥 Loaded {len(users)} user(s) from config")
     print(f"🆔 Execution ID: {execution_id}")
 
+    # Skip users whose same change already succeeded in a previous run
+    completed_users = CompletedUsersCache(ttl_sec=skip_completed_ttl_sec)
+    pending_users = []
+    for user_config in users:
+        if completed_users.is_completed(user_fingerprint(admin_creds['csp_admin_url'], user_config)):
+            logger.info(f"Skipping {user_config['target_user']}: already completed")
+            continue
+        pending_users.append(user_config)
+    skipped_count = len(users) - len(pending_users)
+    if skipped_count:
+        print(f"⏭️  Skipped {skipped_count} user(s) already completed in a previous run")
+    users = pending_users
+
     # Statistics
     success_count = 0
     failed_count = 0
     total_processed = 0
-    current_user_index = 0
-
-    # Main interactive loop - process users from list
-    while current_user_index < len(users):
-        user_config = users[current_user_index]
-        print(f"\n{'='*60}")
-        print(f"🔄 User {current_user_index + 1}/{len(users)}: {user_config['target_user']}")
-        print(f"{'='*60}")
-
-        # Retry loop for current user
-        while True:
-            result = process_single_user(
-                admin_creds=admin_creds,
-                user_config=user_config,
-                execution_id=execution_id,
-                logger=logger,
-                user_index=current_user_index + 1
-            )
 
-            if result['success']:
-                success_count += 1
-                total_processed += 1
-                logger.info(f"User {result['user']} completed successfully")
-                print(f"\n✅ Thành công! User {result['user']} đã được xử lý.")
+    # Results are appended as each user finishes (crash-safe)
+    results_file = f"logs/csp_admin/{execution_id}/results.jsonl"
+    results_writer = ResultsWriter(results_file)
 
-                # Move to next user
-                current_user_index += 1
+    try:
+        # Main interactive loop - process users from list
+        for user_index, user_config in enumerate(users, 1):
+            print(f"\n{'='*60}")
+            print(f"🔄 User {user_index}/{len(users)}: {user_config['target_user']}")
+            print(f"{'='*60}")
+
+            # Retry loop for current user
+            retries_left = auto_retry
+            while True:
+                result = process_single_user(
+                    admin_creds=admin_creds,
+                    user_config=user_config,
+                    execution_id=execution_id,
+                    logger=logger,
+                    user_index=user_index,
+                    block_assets=block_assets,
+                    session_state_ttl_sec=session_state_ttl_sec,
+                    screenshots=screenshots
+                )
+                if result['success']:
+                    break
 
-                # Ask if continue to next user
-                if current_user_index < len(users):
-                    continue_choice = input(f"\nTiếp tục xử lý user tiếp theo? (y/n): ").strip().lower()
-                    if continue_choice != 'y':
-                        print("\n🛑 Dừng xử lý theo yêu cầu.")
-                        break
-                break
-            else:
                 logger.error(f"User {result['user']} failed")
                 print(f"\n❌ Thất bại! User {result['user']} xử lý không thành công.")
 
-                # Ask if retry
-                retry = input("\n🔄 Thử lại user này? (y/n): ").strip().lower()
-                if retry == 'y':
-                    print("\n🔄 Đang thử lại...")
-                    continue
+                # Retry automatically while auto_retry budget remains, else ask
+                if retries_left > 0:
+                    retries_left -= 1
+                    retry = 'y'
+                elif auto_continue:
+                    retry = 'n'
                 else:
-                    # Don't retry, move to next
-                    failed_count += 1
-                    total_processed += 1
-                    current_user_index += 1
-
-                    # Ask if continue to next user
-                    if current_user_index < len(users):
-                        continue_choice = input(f"\nTiếp tục xử lý user tiếp theo? (y/n): ").strip().lower()
-                        if continue_choice != 'y':
-                            print("\n🛑 Dừng xử lý theo yêu cầu.")
-                            break
+                    retry = input("\n🔄 Thử lại user này? (y/n): ").strip().lower()
+                if retry != 'y':
                     break
+                print("\n🔄 Đang thử lại...")
 
-        # Check if user wants to stop
-        if current_user_index < len(users):
-            # Check from last continue_choice
-            if 'continue_choice' in locals() and continue_choice != 'y':
-                break
+            results_writer.write(result)
+            total_processed += 1
+            if result['success']:
+                completed_users.mark_completed(user_fingerprint(admin_creds['csp_admin_url'], user_config))
+                success_count += 1
+                logger.info(f"User {result['user']} completed successfully")
+                print(f"\n✅ Thành công! User {result['user']} đã được xử lý.")
+            else:
+                failed_count += 1
+
+            # Ask if continue to next user
+            if user_index < len(users) and not auto_continue:
+                continue_choice = input(f"\nTiếp tục xử lý user tiếp theo? (y/n): ").strip().lower()
+                if continue_choice != 'y':
+                    print("\n🛑 Dừng xử lý theo yêu cầu.")
+                    break
+    finally:
+        # Close the results file and browser even if the loop raises
+        results_writer.close()
+        _stop_session_nova()
 
     # Final summary
     print(f"\n{'='*60}")
     print("📊 TỔNG KẾT")
     print(f"{'='*60}")
-    print(f"Tổng users trong file: {len(users)}")
+    print(f"Tổng users trong file: {len(users) + skipped_count}")
+    if skipped_count:
+        print(f"⏭️  Bỏ qua (đã hoàn thành): {skipped_count}")
     print(f"Đã xử lý: {total_processed}")
     print(f"✅ Thành công: {success_count}")
     print(f"❌ Thất bại: {failed_count}")
@@ -324,7 +384,9 @@ def main(
         print(f"Tỷ lệ thành công: {(success_count/total_processed*100):.1f}%")
     print(f"\n🆔 Execution ID: {execution_id}")
     print(f"📂 Logs: logs/csp_admin/{execution_id}/")
-    print(f"📸 Screenshots: screenshots/")
+    print(f"📄 Results: {results_file}")
+    if screenshots:
+        print(f"📸 Screenshots: screenshots/")
     print(f"{'='*60}")
 
     logger.info("Automation completed")
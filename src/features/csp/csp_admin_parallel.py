@@ -1,104 +1,227 @@
-import json
 import sys
 import os
 from pathlib import Path
 from datetime import datetime
 from dotenv import load_dotenv
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from pydantic import BaseModel
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing.util import Finalize
+from dataclasses import dataclass, field, asdict
 import pandas as pd
 
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 from nova_act import NovaAct
+from src.shared.nova_manager import NovaManager, get_nova_act_api_key
 from src.shared.logger import setup_automation_logger
 from src.shared.screenshot_utils import ScreenshotManager
-from src.shared.handler_wrapper import HandlerWrapper
+from src.shared.handler_wrapper import HandlerWrapper, StepFailedError
+from src.shared.results_writer import ResultsWriter
+from src.shared.completed_users import CompletedUsersCache, user_fingerprint
 
-from src.features.csp.handlers.csp_login_handler import CSPLoginHandler
-from src.features.csp.handlers.csp_user_search_handler import CSPUserSearchHandler
-from src.features.csp.handlers.csp_role_handler import CSPRoleHandler
-from src.features.csp.handlers.csp_branch_handler import CSPBranchHandler
-from src.features.csp.handlers.csp_save_handler import CSPSaveHandler
+from src.features.csp.csp_config import load_input_config
+from src.features.csp.csp_user_steps import apply_user_changes, CHANGE_STATUS
+from src.features.csp.handlers.csp_login_handler import CSPLoginHandler, is_logged_in
 
 load_dotenv()
 
 
-class UserProcessResult(BaseModel):
+@dataclass(slots=True)
+class UserProcessResult:
     """Model for user processing result"""
     user_id: str
     status: str  # "Success" or "Failed"
-    error_message: str | None = None
     execution_time: float  # seconds
-    failed_steps: list[str] = []
+    timestamp: str  # finish time, "YYYY-MM-DD HH:MM:SS"
+    error_message: str | None = None
+    failed_steps: list[str] = field(default_factory=list)
+
+
+# Per-process worker state. Each ProcessPoolExecutor worker keeps one NovaAct
+# session (logged in once) and reuses it for every user it is handed.
+_worker_state = {
+    'admin_creds': None,
+    'execution_id': None,
+    'block_assets': False,
+    'session_state_ttl_sec': 0,
+    'users_per_session': 0,
+    'screenshots': True,
+    'nova': None,
+    'logged_in': False,
+    'users_in_session': 0,
+    'handlers': {},
+    'logger': None,
+}
+
+
+def _worker_init(
+    admin_creds: dict,
+    execution_id: str,
+    block_assets: bool = False,
+    session_state_ttl_sec: int = 0,
+    users_per_session: int = 0,
+    screenshots: bool = True
+):
+    """Initializer for ProcessPoolExecutor workers."""
+    load_dotenv()
+    _worker_state['admin_creds'] = admin_creds
+    _worker_state['execution_id'] = execution_id
+    _worker_state['block_assets'] = block_assets
+    _worker_state['session_state_ttl_sec'] = session_state_ttl_sec
+    _worker_state['users_per_session'] = users_per_session
+    _worker_state['screenshots'] = screenshots
+
+    # Pool workers exit via os._exit, so atexit hooks never fire.
+    # multiprocessing finalizers do run on worker shutdown.
+    Finalize(None, _stop_worker_nova, exitpriority=10)
+
+
+def _get_worker_nova() -> NovaAct:
+    """
+    Return this worker's NovaAct session, starting it on first use.
+
+    The session is recycled after users_per_session users (0 = never) to
+    bound browser memory growth on long runs.
+    """
+    users_per_session = _worker_state['users_per_session']
+    if _worker_state['nova'] is not None and users_per_session and \
+            _worker_state['users_in_session'] >= users_per_session:
+        _stop_worker_nova()
+
+    if _worker_state['nova'] is not None:
+        _worker_state['users_in_session'] += 1
+        return _worker_state['nova']
+
+    api_key = get_nova_act_api_key()
+
+    logs_dir = f"logs/csp_admin_parallel/{_worker_state['execution_id']}_worker{os.getpid()}"
+    Path(logs_dir).mkdir(parents=True, exist_ok=True)
+
+    nova = NovaManager.start_with_retry(lambda: NovaAct(
+        starting_page=_worker_state['admin_creds']['csp_admin_url'],
+        headless=True,  # Always headless for parallel execution
+        nova_act_api_key=api_key,
+        ignore_https_errors=True,
+        logs_directory=logs_dir
+    ))
+
+    if _worker_state['block_assets']:
+        NovaManager.block_resources(nova)
+
+    _worker_state['nova'] = nova
+    _worker_state['logged_in'] = False
+    _worker_state['users_in_session'] = 1
+    _worker_state['handlers'] = {}
+    return nova
+
+
+def _stop_worker_nova():
+    """Stop this worker's NovaAct session (if any) so the next user starts fresh."""
+    nova = _worker_state['nova']
+    _worker_state['nova'] = None
+    _worker_state['logged_in'] = False
+    _worker_state['users_in_session'] = 0
+    _worker_state['handlers'] = {}
+
+    if nova:
+        try:
+            nova.stop()
+        except Exception:
+            pass
+
+
+def _get_worker_logger():
+    """
+    Return this worker's logger, creating it on first use.
+
+    One logger (and log file) per worker process: a logger per user would
+    leave an open file handler behind in the worker for every user.
+    """
+    if _worker_state['logger'] is None:
+        _worker_state['logger'] = setup_automation_logger(
+            "csp_admin_parallel",
+            f"{_worker_state['execution_id']}_worker{os.getpid()}"
+        )
+    return _worker_state['logger']
+
+
+def _get_worker_handler(handler_cls):
+    """
+    Return this session's handler_cls instance, creating it on first use.
+
+    Handlers only hold the session's page and locators, so one instance per
+    session serves every user processed on it.
+    """
+    handlers = _worker_state['handlers']
+    handler = handlers.get(handler_cls)
+    if handler is None:
+        handler = handlers[handler_cls] = handler_cls(_worker_state['nova'])
+    return handler
 
 
 def process_single_user_parallel(
-    admin_creds: dict,
     user_config: dict,
-    execution_id: str,
     user_index: int = 1
 ) -> UserProcessResult:
     """
-    Process a single user in parallel (headless mode).
+    Process a single user inside a pool worker (headless mode).
+
+    The worker's NovaAct session is created and logged in on first use and
+    then reused for the following users; it is discarded after a failure.
 
     Args:
-        admin_creds: Admin credentials dict
         user_config: User config dict with target_user, new_role, branch_hierarchy
-        execution_id: Execution ID for logging
         user_index: User index for identification
 
     Returns:
         UserProcessResult object with processing status
     """
+    admin_creds = _worker_state['admin_creds']
+    execution_id = _worker_state['execution_id']
+
     user_id = user_config['target_user']
+    new_role = user_config.get('new_role')
+    branch_hierarchy = user_config.get('branch_hierarchy')
     user_execution_id = f"{execution_id}_user{user_index}_{user_id}"
 
-    # Setup logger for this user
-    logger = setup_automation_logger("csp_admin_parallel", user_execution_id)
-
     print(f"🔄 [Parallel] Processing user: {user_id}")
-    logger.info(f"Starting parallel processing for user: {user_id}")
-
     start_time = time.time()
 
-    # Get API key
-    api_key = os.getenv('NOVA_ACT_API_KEY')
-    if not api_key:
-        raise ValueError("NOVA_ACT_API_KEY not found in .env file")
-
-    # Create screenshot manager
-    screenshot_manager = ScreenshotManager(
-        base_dir="screenshots",
-        execution_id=user_execution_id
-    )
-
-    result = {
-        'success': False,
-        'failed_steps': [],
-        'user': user_id
-    }
+    logger = None
+    failed_steps = []
+    error_msg = None
 
     try:
-        # Create logs directory first
-        logs_dir = f"logs/csp_admin_parallel/{user_execution_id}"
-        Path(logs_dir).mkdir(parents=True, exist_ok=True)
-
-        # Create Nova instance with context manager (headless for parallel)
-        with NovaAct(
-            starting_page=admin_creds['csp_admin_url'],
-            headless=True,  # Always headless for parallel execution
-            nova_act_api_key=api_key,
-            ignore_https_errors=True,
-            logs_directory=logs_dir
-        ) as nova:
-
-            wrapper = HandlerWrapper()
-            has_changes = False
-
+        logger = _get_worker_logger()
+        logger.info(f"Starting parallel processing for user: {user_id}")
+
+        # Create screenshot manager
+        screenshot_manager = ScreenshotManager(
+            base_dir="screenshots",
+            execution_id=user_execution_id
+        ) if _worker_state['screenshots'] else None
+
+        nova = _get_worker_nova()
+
+        wrapper = HandlerWrapper()
+
+        if _worker_state['logged_in']:
+            # Reused session: back to the user list instead of logging in again
+            logger.info("Reusing logged-in session")
+            nova.page.goto(admin_creds['csp_admin_url'])
+            if not is_logged_in(nova.page):
+                # Session expired mid-run: fall back to a fresh login
+                logger.info("Reused session is no longer logged in")
+                print(f"🔐 [Parallel] Session expired, logging in again: {user_id}")
+                _worker_state['logged_in'] = False
+
+        if not _worker_state['logged_in']:
             # Step 1: Login
-            login_handler = CSPLoginHandler(nova, screenshot_manager=screenshot_manager)
+            login_handler = CSPLoginHandler(
+                nova,
+                screenshot_manager=screenshot_manager,
+                session_state_ttl_sec=_worker_state['session_state_ttl_sec']
+            )
             success = wrapper.execute_with_retry(
                 step_name="login",
                 handler_func=login_handler.login,
@@ -107,122 +230,80 @@ def process_single_user_parallel(
                 password=admin_creds['password']
             )
             if not success:
-                result['failed_steps'].append("login")
-                raise Exception("Login failed")
+                raise StepFailedError("login", "Login failed")
+            _worker_state['logged_in'] = True
+
+        # Steps 2-5: Search, change role/branch, save
+        changes = apply_user_changes(
+            nova,
+            _get_worker_handler,
+            user_id,
+            new_role=new_role,
+            branch_hierarchy=branch_hierarchy,
+            screenshot_manager=screenshot_manager,
+            logger=logger,
+            max_retries=3
+        )
 
-            # Step 2: Search user
-            search_handler = CSPUserSearchHandler(nova)
-            success = wrapper.execute_with_retry(
-                step_name="search_user",
-                handler_func=search_handler.search_and_open_edit,
-                max_retries=3,
-                target_user=user_id
-            )
-            if not success:
-                result['failed_steps'].append("search_user")
-                raise Exception("User search failed")
-
-            # Screenshot after opening edit
-            if screenshot_manager:
-                screenshot_manager.capture(nova, step_name="edit_form_opened")
-
-            # Step 3: Change role (optional)
-            if user_config.get('new_role'):
-                role_handler = CSPRoleHandler(nova)
-                success = wrapper.execute_with_retry(
-                    step_name="change_role",
-                    handler_func=role_handler.change_role,
-                    max_retries=3,
-                    new_role=user_config['new_role']
-                )
-                if not success:
-                    result['failed_steps'].append("change_role")
-                    raise Exception("Role change failed")
-                if role_handler.has_changes:
-                    has_changes = True
-
-            # Step 4: Change branch (optional)
-            if user_config.get('branch_hierarchy'):
-                branch_handler = CSPBranchHandler(nova)
-                success = wrapper.execute_with_retry(
-                    step_name="change_branch",
-                    handler_func=branch_handler.change_branch_hierarchical,
-                    max_retries=3,
-                    branch_hierarchy=user_config['branch_hierarchy']
-                )
-                if not success:
-                    result['failed_steps'].append("change_branch")
-                    raise Exception("Branch change failed")
-                if branch_handler.has_changes:
-                    has_changes = True
-
-            # Step 5: Save changes only if there were changes
-            if has_changes:
-                if screenshot_manager:
-                    screenshot_manager.capture(nova, step_name="before_save")
-
-                save_handler = CSPSaveHandler(nova)
-                success = wrapper.execute_with_retry(
-                    step_name="save_changes",
-                    handler_func=save_handler.save_changes,
-                    max_retries=3
-                )
-                if not success:
-                    result['failed_steps'].append("save_changes")
-                    raise Exception("Save failed")
-
-                if screenshot_manager:
-                    screenshot_manager.capture(nova, step_name="after_save")
-            else:
-                logger.info("No changes detected. Skipping save.")
-
-            # Success
-            result['success'] = True
-            execution_time = time.time() - start_time
-
-            logger.info(f"Successfully processed {user_id} in {execution_time:.1f}s")
-            print(f"✅ [Parallel] Completed: {user_id} ({execution_time:.1f}s)")
-
-            return UserProcessResult(
-                user_id=user_id,
-                status="Success",
-                error_message=None,
-                execution_time=execution_time,
-                failed_steps=[]
-            )
+        # Success
+        execution_time = time.time() - start_time
+        logger.info(f"Successfully processed {user_id} in {execution_time:.1f}s - {CHANGE_STATUS[changes]}")
+        print(f"✅ [Parallel] Completed: {user_id} ({execution_time:.1f}s) - {CHANGE_STATUS[changes]}")
 
     except Exception as e:
         execution_time = time.time() - start_time
         error_msg = str(e)
+        if isinstance(e, StepFailedError):
+            failed_steps.append(e.step_name)
 
-        logger.error(f"Failed to process {user_id}: {error_msg}")
+        if logger:
+            logger.error(f"Failed to process {user_id}: {error_msg}")
         print(f"❌ [Parallel] Failed: {user_id} - {error_msg}")
 
-        return UserProcessResult(
-            user_id=user_id,
-            status="Failed",
-            error_message=error_msg,
-            execution_time=execution_time,
-            failed_steps=result.get('failed_steps', [])
-        )
+        # Page state is unknown after a failure - start the next user on a fresh session
+        _stop_worker_nova()
+
+    # Single exit point: one result per user
+    return UserProcessResult(
+        user_id=user_id,
+        status="Failed" if error_msg else "Success",
+        error_message=error_msg,
+        execution_time=execution_time,
+        timestamp=datetime.now().isoformat(sep=' ', timespec='seconds'),
+        failed_steps=failed_steps
+    )
 
 
 def main(
     input_file: str = None,
     url: str = None,
     execution_id: str = None,
-    max_workers: int = 3
+    max_workers: int = 3,
+    block_assets: bool = False,
+    session_state_ttl_sec: int = 0,
+    users_per_session: int = 50,
+    skip_completed_ttl_sec: int = 0,
+    screenshots: bool = True
 ):
     """
     Main function to run parallel CSP Admin automation.
 
-    Processes multiple users concurrently using ThreadPoolExecutor.
+    Processes multiple users concurrently using ProcessPoolExecutor. Each
+    worker process keeps its own logged-in NovaAct session across users.
 
     Args:
         input_file: Path to input.json file
         url: Override URL (optional)
         execution_id: Execution ID (auto-generated if not provided)
         max_workers: Maximum number of parallel workers (default: 3)
+        block_assets: Skip loading images/media/fonts in the browser (default: False)
+        session_state_ttl_sec: Reuse a saved admin login younger than this many
+            seconds; 0 disables (default: 0)
+        users_per_session: Restart a worker's browser after this many users;
+            0 keeps one browser per worker for the whole run (default: 50)
+        skip_completed_ttl_sec: Skip users whose same change succeeded within
+            this many seconds in a previous run; 0 disables (default: 0)
+        screenshots: Capture step screenshots for each user (default: True)
 
     Usage:
         # Basic parallel processing
@@ -231,10 +312,32 @@ def main(
         # With custom max workers
         python src/features/csp/csp_admin_parallel.py --max_workers 5
 
+        # Without images/media/fonts
+        python src/features/csp/csp_admin_parallel.py --block_assets
+
+        # Reuse the admin login for up to 1 hour
+        python src/features/csp/csp_admin_parallel.py --session_state_ttl_sec 3600
+
+        # Re-run, skipping users completed within the last day
+        python src/features/csp/csp_admin_parallel.py --skip_completed_ttl_sec 86400
+
+        # Without step screenshots
+        python src/features/csp/csp_admin_parallel.py --noscreenshots
+
         # With custom input file
         python src/features/csp/csp_admin_parallel.py --input_file custom_input.json
     """
 
+    # Validate arguments before loading anything or starting browsers
+    if not isinstance(max_workers, int) or max_workers < 1:
+        raise ValueError(f"max_workers must be a positive integer, got {max_workers!r}")
+    if not isinstance(session_state_ttl_sec, int) or session_state_ttl_sec < 0:
+        raise ValueError(f"session_state_ttl_sec must be >= 0, got {session_state_ttl_sec!r}")
+    if not isinstance(users_per_session, int) or users_per_session < 0:
+        raise ValueError(f"users_per_session must be >= 0, got {users_per_session!r}")
+    if not isinstance(skip_completed_ttl_sec, int) or skip_completed_ttl_sec < 0:
+        raise ValueError(f"skip_completed_ttl_sec must be >= 0, got {skip_completed_ttl_sec!r}")
+
     # Generate execution ID
     if not execution_id:
         execution_id = datetime.now().strftime('%Y%m%d_%H%M%S')
@@ -255,8 +358,7 @@ def main(
     logger.info(f"Loading config from: {input_file}")
     print(f"📂 Loading config from: {input_file}")
 
-    with open(input_file) as f:
-        config = json.load(f)
+    config = load_input_config(input_file).model_dump()
 
     admin_creds = config['admin_credentials']
     users = config['users']
@@ -271,6 +373,19 @@ def main(
     print(f"👥 Loaded {len(users)} user(s) from config")
     print(f"🔄 Max parallel workers: {max_workers}")
     print(f"🆔 Execution ID: {execution_id}")
+
+    # Skip users whose same change already succeeded in a previous run
+    completed_users = CompletedUsersCache(ttl_sec=skip_completed_ttl_sec)
+    pending_users = []
+    for user_config in users:
+        if completed_users.is_completed(user_fingerprint(admin_creds['csp_admin_url'], user_config)):
+            logger.info(f"Skipping {user_config['target_user']}: already completed")
+            continue
+        pending_users.append(user_config)
+    skipped_count = len(users) - len(pending_users)
+    if skipped_count:
+        print(f"⏭️  Skipped {skipped_count} user(s) already completed in a previous run")
+    users = pending_users
     print("=" * 60)
     print()
 
@@ -278,40 +393,71 @@ def main(
     print("📋 Users to process:")
     for i, user_config in enumerate(users, 1):
         target = user_config.get('target_user', 'Unknown')
-        role = user_config.get('new_role', 'No change')
-        branch = user_config.get('branch_hierarchy', [])
+        role = user_config.get('new_role') or 'No change'
+        branch = user_config.get('branch_hierarchy') or []
         branch_code = branch[-1] if branch else 'N/A'
         print(f"   {i}. {target} → Branch: {branch_code} | Role: {role}")
     print()
 
     # Execute parallel processing
     results = []
-
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+    successful = 0
+    results_file = f"logs/csp_admin_parallel/{execution_id}/results.jsonl"
+
+    with ResultsWriter(results_file) as results_writer, ProcessPoolExecutor(
+        max_workers=max_workers,
+        initializer=_worker_init,
+        initargs=(
+            admin_creds, execution_id, block_assets, session_state_ttl_sec,
+            users_per_session, screenshots
+        )
+    ) as executor:
         # Submit all user tasks
         future_to_user = {
             executor.submit(
                 process_single_user_parallel,
-                admin_creds,
                 user_config,
-                execution_id,
                 i + 1
-            ): user_config['target_user']
+            ): user_config
             for i, user_config in enumerate(users)
         }
 
         # Collect results as they complete
         print("⏳ Starting parallel processing...\n")
-        for future in as_completed(future_to_user.keys()):
-            result = future.result()
-            if result is not None:
-                results.append(result.model_dump())
+        append_result = results.append
+        write_result = results_writer.write
+        for future in as_completed(future_to_user):
+            user_config = future_to_user[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                # Crashed worker (BrokenProcessPool) or pickling error: record
+                # the user as failed and keep collecting the others
+                logger.error(f"Worker error for {user_config['target_user']}: {e}")
+                print(f"❌ [Parallel] Worker error: {user_config['target_user']} - {e}")
+                result = UserProcessResult(
+                    user_id=user_config['target_user'],
+                    status="Failed",
+                    execution_time=0.0,
+                    timestamp=datetime.now().isoformat(sep=' ', timespec='seconds'),
+                    error_message=f"Worker error: {e}"
+                )
+
+            result_data = asdict(result)
+            append_result(result_data)
+            write_result(result_data)
+            if result.status == 'Success':
+                successful += 1
+                completed_users.mark_completed(
+                    user_fingerprint(admin_creds['csp_admin_url'], user_config)
+                )
 
     # Display results
     print("\n" + "=" * 60)
     print("📊 PARALLEL PROCESSING RESULTS")
     print("=" * 60)
 
+    failed = len(results) - successful
     if results:
         results_df = pd.DataFrame(results)
         # Sort by status (Success first) then by execution time
@@ -320,8 +466,6 @@ def main(
         print(f"\n{results_df.to_string()}\n")
 
         # Summary stats
-        successful = len([r for r in results if r['status'] == 'Success'])
-        failed = len(results) - successful
         total_time = sum(r['execution_time'] for r in results)
         avg_time = total_time / len(results)
 
@@ -333,8 +477,10 @@ def main(
         print(f"⏱️  Average time per user: {avg_time:.1f}s")
         print(f"⏱️  Total processing time: {total_time:.1f}s")
         print(f"🆔 Execution ID: {execution_id}")
-        print(f"📂 Logs: logs/csp_admin_parallel/{execution_id}_user*/")
-        print(f"📸 Screenshots: screenshots/")
+        print(f"📂 Logs: logs/csp_admin_parallel/ ({execution_id}_worker*)")
+        print(f"📄 Results: {results_file}")
+        if screenshots:
+            print(f"📸 Screenshots: screenshots/")
         print("=" * 60)
 
         # Show failed users details
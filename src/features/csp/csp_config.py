@@ -0,0 +1,115 @@
+import logging
+from functools import lru_cache
+from pathlib import Path
+from pydantic import BaseModel, ConfigDict, Field, ValidationError, field_validator, model_validator
+
+logger = logging.getLogger(__name__)
+
+# [Bank, Region, Branch]
+BRANCH_HIERARCHY_LEVELS = 3
+
+
+class AdminCredentials(BaseModel):
+    """Admin account used to log in to CSP Admin"""
+    model_config = ConfigDict(frozen=True)
+
+    username: str
+    password: str
+    csp_admin_url: str
+
+
+class UserConfig(BaseModel):
+    """One user to update"""
+    model_config = ConfigDict(frozen=True)
+
+    target_user: str = Field(min_length=1)
+    new_role: str | None = None
+    branch_hierarchy: list[str] | None = None
+
+    @field_validator('new_role')
+    @classmethod
+    def empty_role_means_unchanged(cls, value):
+        return value or None
+
+    @field_validator('branch_hierarchy')
+    @classmethod
+    def check_branch_hierarchy(cls, value):
+        # [] means "do not change branch"
+        if not value:
+            return None
+        if len(value) < BRANCH_HIERARCHY_LEVELS:
+            raise ValueError(f"need at least {BRANCH_HIERARCHY_LEVELS} levels [Bank, Region, Branch], got {len(value)}")
+        return value
+
+    @model_validator(mode='after')
+    def check_has_change(self):
+        if not self.new_role and not self.branch_hierarchy:
+            raise ValueError("nothing to change: set new_role and/or branch_hierarchy")
+        return self
+
+
+class InputConfig(BaseModel):
+    """Schema of input.json (frozen: instances are shared by the load cache)"""
+    model_config = ConfigDict(frozen=True)
+
+    admin_credentials: AdminCredentials
+    users: list[UserConfig] = Field(min_length=1)
+
+    @field_validator('users')
+    @classmethod
+    def drop_duplicate_users(cls, users):
+        # Identical entries are dropped. The same user with different changes is
+        # rejected: the parallel runner would edit that account from two browsers
+        # at once, and which save wins would be random.
+        seen = {}
+        unique_users = []
+        for user in users:
+            change = (user.new_role, tuple(user.branch_hierarchy or ()))
+            if user.target_user not in seen:
+                seen[user.target_user] = change
+                unique_users.append(user)
+            elif seen[user.target_user] == change:
+                logger.warning(f"Duplicate entry for {user.target_user} ignored")
+            else:
+                raise ValueError(
+                    f"conflicting entries for {user.target_user}: "
+                    "combine new_role and branch_hierarchy into one entry"
+                )
+        return unique_users
+
+
+def load_input_config(input_file: str | Path) -> InputConfig:
+    """
+    Load and validate input.json in a single parse + validate pass.
+
+    Results are cached per (absolute path, mtime, size), so re-running with an
+    unchanged file does not re-read it; editing the file invalidates the entry.
+    Size is part of the key because coarse mtime granularity (FAT/exFAT, some
+    network mounts) can leave mtime unchanged across a quick rewrite.
+
+    Args:
+        input_file: Path to input.json
+
+    Returns:
+        Validated InputConfig
+
+    Raises:
+        ValueError: If the file is not valid JSON or does not match the schema
+    """
+    path = Path(input_file).resolve()
+    stat = path.stat()
+    return _load_input_config_cached(str(path), stat.st_mtime_ns, stat.st_size)
+
+
+@lru_cache(maxsize=8)
+def _load_input_config_cached(input_file: str, mtime_ns: int, size: int) -> InputConfig:
+    raw = Path(input_file).read_bytes()
+
+    try:
+        return InputConfig.model_validate_json(raw)
+    except ValidationError as e:
+        details = "; ".join(
+            f"{'.'.join(str(part) for part in err['loc']) or '<root>'}: {err['msg']}"
+            for err in e.errors()
+        )
+        raise ValueError(f"Invalid config {input_file}: {details}") from e
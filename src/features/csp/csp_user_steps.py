@@ -0,0 +1,147 @@
+from typing import Callable
+
+from src.shared.handler_wrapper import HandlerWrapper, StepFailedError
+
+from src.features.csp.handlers.csp_user_search_handler import CSPUserSearchHandler
+from src.features.csp.handlers.csp_role_handler import CSPRoleHandler
+from src.features.csp.handlers.csp_branch_handler import CSPBranchHandler
+from src.features.csp.handlers.csp_save_handler import CSPSaveHandler
+from src.features.csp.handlers.csp_precheck_handler import CSPPrecheckHandler
+
+# Field bits, used for both the "already set" and the "changed" masks
+ROLE_FIELD = 1
+BRANCH_FIELD = 2
+
+# Outcome text indexed by the change mask
+CHANGE_STATUS = (
+    "no changes needed",
+    "role updated",
+    "branch updated",
+    "role and branch updated",
+)
+
+# Optional change steps, run in order:
+# (step_name, handler class, handler method, config key, field bit, failure message)
+CHANGE_STEPS = (
+    ("change_role", CSPRoleHandler, "change_role", "new_role", ROLE_FIELD, "Role change failed"),
+    ("change_branch", CSPBranchHandler, "change_branch_hierarchical", "branch_hierarchy", BRANCH_FIELD, "Branch change failed"),
+)
+
+
+def apply_user_changes(
+    nova,
+    get_handler: Callable,
+    target_user: str,
+    new_role: str = None,
+    branch_hierarchy: list = None,
+    screenshot_manager=None,
+    logger=None,
+    max_retries: int = 5,
+    save_retries: int = 3
+) -> int:
+    """
+    Search target_user, apply the requested role/branch changes and save.
+
+    Runs on an already logged-in session; both runners call this after their
+    own login/resume step.
+
+    Args:
+        nova: NovaAct instance on the CSP admin user list
+        get_handler: Returns the (cached) handler instance for a handler class
+        target_user: Login of the user to update
+        new_role: Role to set (optional)
+        branch_hierarchy: [bank, region, branch] to set (optional)
+        screenshot_manager: Optional ScreenshotManager
+        logger: Logger for this run
+        max_retries: Attempts for search and change steps
+        save_retries: Attempts for the save step
+
+    Returns:
+        ROLE_FIELD | BRANCH_FIELD bits for the changes made (index into CHANGE_STATUS)
+
+    Raises:
+        StepFailedError: When a step still fails after all retries
+    """
+    wrapper = HandlerWrapper()
+    changes = 0
+
+    # Step 2: Search user
+    success = wrapper.execute_with_retry(
+        step_name="search_user",
+        handler_func=get_handler(CSPUserSearchHandler).search_and_open_edit,
+        max_retries=max_retries,
+        target_user=target_user
+    )
+    if not success:
+        raise StepFailedError("search_user", "User search failed")
+
+    # Screenshot after opening edit
+    if screenshot_manager:
+        screenshot_manager.capture(nova, step_name="edit_form_opened")
+
+    # One combined check when both role and branch are requested, so
+    # already-configured users cost a single act instead of one per field
+    requested = {'new_role': new_role, 'branch_hierarchy': branch_hierarchy}
+    prechecked = False
+    already_set = 0  # ROLE_FIELD | BRANCH_FIELD bits already matching
+    if new_role and branch_hierarchy:
+        state = get_handler(CSPPrecheckHandler).check_current_state(new_role, branch_hierarchy)
+        if state is not None:
+            already_set = (ROLE_FIELD if state['role_match'] else 0) | \
+                (BRANCH_FIELD if state['branch_match'] else 0)
+            prechecked = True
+            if already_set == ROLE_FIELD | BRANCH_FIELD:
+                logger.info("Role and branch already set. No changes needed.")
+
+    # Steps 3-4: Change role / branch (each optional)
+    pending_steps = [
+        step for step in CHANGE_STEPS
+        if requested[step[3]] and not already_set & step[4]
+    ]
+    # When both fields change, verify them together in one act afterwards
+    verify_each = len(pending_steps) < 2
+    for step_name, handler_cls, method_name, key, field_bit, failure_msg in pending_steps:
+        handler = get_handler(handler_cls)
+        success = wrapper.execute_with_retry(
+            step_name=step_name,
+            handler_func=getattr(handler, method_name),
+            max_retries=max_retries,
+            check_current=not prechecked,
+            verify=verify_each,
+            **{key: requested[key]}
+        )
+        if not success:
+            raise StepFailedError(step_name, failure_msg)
+        # Track changes
+        if handler.has_changes:
+            changes |= field_bit
+
+    # Verify both fields in one act (same prompt as the precheck)
+    if changes and not verify_each:
+        state = get_handler(CSPPrecheckHandler).check_current_state(
+            new_role, branch_hierarchy, use_page_text=False
+        )
+        if not state or not (state['role_match'] and state['branch_match']):
+            raise StepFailedError("verify_changes", "Role/branch verification failed")
+        print("  ✓ Role and branch verified")
+
+    # Step 5: Save changes only if there were changes
+    if changes:
+        if screenshot_manager:
+            screenshot_manager.capture(nova, step_name="before_save")
+
+        success = wrapper.execute_with_retry(
+            step_name="save_changes",
+            handler_func=get_handler(CSPSaveHandler).save_changes,
+            max_retries=save_retries
+        )
+        if not success:
+            raise StepFailedError("save_changes", "Save failed")
+
+        if screenshot_manager:
+            screenshot_manager.capture(nova, step_name="after_save")
+    else:
+        logger.info("No changes detected. Skipping save.")
+        print("\nℹ️  No changes detected. Skipping save.")
+
+    return changes
@@ -4,6 +4,7 @@ from .csp_user_search_handler import CSPUserSearchHandler
 from .csp_role_handler import CSPRoleHandler
 from .csp_branch_handler import CSPBranchHandler
 from .csp_save_handler import CSPSaveHandler
+from .csp_precheck_handler import CSPPrecheckHandler
 
 __all__ = [
     'CSPLoginHandler',
@@ -11,4 +12,5 @@ __all__ = [
     'CSPRoleHandler',
     'CSPBranchHandler',
     'CSPSaveHandler',
+    'CSPPrecheckHandler',
 ]
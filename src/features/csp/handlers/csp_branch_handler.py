@@ -2,24 +2,68 @@ from nova_act import NovaAct, ActInvalidModelGenerationError, BOOL_SCHEMA
 from typing import List
 import sys
 from pathlib import Path
-import time
 
 sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
 
 from shared.logger import setup_logger
 from shared.retry_utils import format_error_for_display
+from shared.wait_utils import is_text_absent, wait_for_function_or_sleep, ensure_tab_selected
 
 logger = setup_logger(__name__)
 
+# Prompt templates, filled with str.format per call
+SCOPE_ALREADY_SET_PROMPT = (
+    "Look at the Scope field in the FIRST row. Does it already show the path with "
+    "'{branch}' (like '... / {region} / {branch}' or similar)?"
+)
+SCOPE_UPDATED_PROMPT = (
+    "Look at the Scope field in the FIRST row. Does it now show the path with "
+    "'{branch}' (like '... / {region} / {branch}' or similar)?"
+)
+HIERARCHY_SELECT_PROMPT = (
+    "{open_field}. "
+    "Then in the LEFTMOST column, click on '{bank}'. "
+    "Then in the MIDDLE column, click on '{region}'. "
+    "Then in the rightmost column, type '{branch}' in the search box and check the '{branch}' checkbox. "
+    "Finally click the purple 'Select' button to confirm the selection"
+)
+# True once the selector dialog (and its 'Select' button) is gone
+SELECTOR_CLOSED_JS = """
+() => ![...document.querySelectorAll('button')].some(
+    b => b.offsetParent !== null && b.textContent.trim() === 'Select'
+)
+"""
+
+# Hierarchical selector fields on the edit form
+SELECTOR_SPECS = {
+    "bank_user": {
+        "label": "Bank user",
+        "open_prompt": "Click the Bank user field",
+        "verify_prompt": None,
+    },
+    "scope": {
+        "label": "Scope",
+        "open_prompt": "In the FIRST row, click the Scope field",
+        "verify_prompt": SCOPE_UPDATED_PROMPT,
+    },
+}
+
 
 class CSPBranchHandler:
 
     def __init__(self, nova: NovaAct):
         self.nova = nova
         self.page = nova.page
+        # Locators are lazy and survive navigation, so build them once
+        self.roles_tab = self.page.locator("text='Roles'").first
         self.has_changes = False  # Track if any changes were made
 
-    def change_branch_hierarchical(self, branch_hierarchy: List[str]) -> bool:
+    def change_branch_hierarchical(
+        self,
+        branch_hierarchy: List[str],
+        check_current: bool = True,
+        verify: bool = True
+    ) -> bool:
         try:
             if not branch_hierarchy or len(branch_hierarchy) < 3:
                 error_msg = "Invalid branch hierarchy (need at least 3 levels)"
@@ -31,29 +75,31 @@ class CSPBranchHandler:
             logger.info(f"Changing branch to: {bank} -> {region} -> {branch}")
 
             # Ensure on Roles tab
-            # Use Playwright for simple tab click (much faster than NovaAct)
-            roles_tab = self.page.locator("text='Roles'").first
-            roles_tab.click()
-            time.sleep(1)
-
-            # Check if branch is already correct
-            logger.debug(f"Checking if branch is already set to: {branch}")
-            print(f"  ➤ Checking current branch...")
-            result = self.nova.act_get(
-                f"Look at the Scope field in the FIRST row. Does it already show the path with '{branch}' (like '... / {region} / {branch}' or similar)?",
-                schema=BOOL_SCHEMA
-            )
-            if result.parsed_response:
-                logger.info(f"Branch already set to: {branch}. Skipping update.")
-                print(f"  ✓ Branch already set to: {branch}. No changes needed.")
-                self.has_changes = False  # No changes made
-                return True
+            # Use Playwright for simple tab click (much faster than NovaAct),
+            # skipped when the edit form already shows the Roles tab
+            ensure_tab_selected(self.roles_tab)
+
+            # Check if branch is already correct (skipped when caller already prechecked
+            # or when the branch is not on the page at all)
+            if check_current and not is_text_absent(self.page, branch):
+                logger.debug("Checking if branch is already set to: %s", branch)
+                print(f"  ➤ Checking current branch...")
+                result = self.nova.act_get(
+                    SCOPE_ALREADY_SET_PROMPT.format(region=region, branch=branch),
+                    schema=BOOL_SCHEMA
+                )
+                if result.parsed_response:
+                    logger.info(f"Branch already set to: {branch}. Skipping update.")
+                    print(f"  ✓ Branch already set to: {branch}. No changes needed.")
+                    self.has_changes = False  # No changes made
+                    return True
 
             # Step 1: Change Bank User
-            self._change_bank_user(bank, region, branch)
+            print("🏦 Step 1: Changing Bank User...")
+            self._apply_hierarchical_selector("bank_user", bank, region, branch)
 
             # Step 2: Change Scope
-            self._change_scope(bank, region, branch)
+            self._apply_hierarchical_selector("scope", bank, region, branch, verify=verify)
 
             logger.info(f"Branch changed successfully to: {branch}")
             print(f"✅ Branch changed successfully to: {branch}")
@@ -66,62 +112,35 @@ class CSPBranchHandler:
             print(error_msg)
             raise
 
-    def _change_bank_user(self, bank: str, region: str, branch: str):
-        logger.debug("Changing Bank User...")
-        print("🏦 Step 1: Changing Bank User...")
-
-        self.nova.act("Click the Bank user field")
-        time.sleep(1)
-
-        self.nova.act(f"In the LEFTMOST column, click on '{bank}'")
-        time.sleep(1)
-
-        self.nova.act(f"In the MIDDLE column, click on '{region}'")
-        time.sleep(1)
-
-        self.nova.act(f"In the rightmost column, type '{branch}' in the search box, check the '{branch}' checkbox")
-        time.sleep(1)
-
-        self.nova.act("Click the purple 'Select' button to confirm the selection")
-        time.sleep(1.5)
-
-        logger.debug(f"Bank user updated to: {branch}")
-        print(f"  ✅ Bank user updated to: {branch}")
-
-    def _change_scope(self, bank: str, region: str, branch: str):
-        """Change Scope with hierarchical selection and verification."""
-        logger.debug("Changing Scope...")
-
-        self.nova.act("In the FIRST row, click the Scope field")
-        time.sleep(1)
-
-        self.nova.act(f"In the LEFTMOST column, click on '{bank}'")
-        time.sleep(1)
-
-        self.nova.act(f"In the MIDDLE column, click on '{region}'")
-        time.sleep(1)
-
-        self.nova.act(f"In the rightmost column, type '{branch}' in the search box, check the '{branch}' checkbox")
-        time.sleep(1)
-
-        self.nova.act("Click the purple 'Select' button to confirm the selection")
-        time.sleep(1.5)
-
-        # Final verification: Check if selector closed and field shows correct value
-        logger.debug("Verifying Scope field updated")
-        try:
-            result = self.nova.act_get(
-                f"Look at the Scope field in the FIRST row. Does it now show the path with '{branch}' (like '... / {region} / {branch}' or similar)?",
-                schema=BOOL_SCHEMA
-            )
-            if result.parsed_response:
-                logger.debug(f"✓ Verification PASSED - Scope field updated")
-                print(f"    ✓ Scope field updated with '{branch}'")
-            else:
-                raise Exception("Scope field should show selected branch path")
-        except ActInvalidModelGenerationError as e:
-            logger.error(f"Verification INVALID: {str(e)}")
-            raise Exception(f"Failed to verify Scope field: {str(e)}")
-
-        logger.debug(f"Scope updated to: {branch}")
-        print(f"  ✅ Scope updated to: {branch}")
+    def _apply_hierarchical_selector(self, field: str, bank: str, region: str, branch: str, verify: bool = True):
+        """Select bank -> region -> branch in a hierarchical selector field (see SELECTOR_SPECS)."""
+        spec = SELECTOR_SPECS[field]
+        label = spec['label']
+        logger.debug("Changing %s...", label)
+
+        # Single composite act: open selector + navigate all levels + confirm
+        self.nova.act(HIERARCHY_SELECT_PROMPT.format(
+            open_field=spec['open_prompt'], bank=bank, region=region, branch=branch
+        ))
+        # Wait for the selector dialog to close instead of a fixed 1.5s
+        wait_for_function_or_sleep(self.page, SELECTOR_CLOSED_JS, timeout=5000, fallback_sleep=1.5)
+
+        # Verification: Check if selector closed and field shows correct value
+        if verify and spec['verify_prompt']:
+            logger.debug("Verifying %s field updated", label)
+            try:
+                result = self.nova.act_get(
+                    spec['verify_prompt'].format(region=region, branch=branch),
+                    schema=BOOL_SCHEMA
+                )
+                if result.parsed_response:
+                    logger.debug("✓ Verification PASSED - %s field updated", label)
+                    print(f"    ✓ {label} field updated with '{branch}'")
+                else:
+                    raise Exception(f"{label} field should show selected branch path")
+            except ActInvalidModelGenerationError as e:
+                logger.error(f"Verification INVALID: {str(e)}")
+                raise Exception(f"Failed to verify {label} field: {str(e)}")
+
+        logger.debug("%s updated to: %s", label, branch)
+        print(f"  ✅ {label} updated to: {branch}")
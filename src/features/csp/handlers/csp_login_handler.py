@@ -1,5 +1,4 @@
 from nova_act import NovaAct
-import time
 import sys
 from pathlib import Path
 
@@ -8,48 +7,96 @@ sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
 from shared.logger import setup_logger
 from shared.retry_utils import format_error_for_display
 from shared.screenshot_utils import capture_screenshot_on_error
+from shared.wait_utils import wait_for_selector_or_sleep
+from shared.session_state import (
+    DEFAULT_SESSION_STATE_FILE,
+    load_session_state,
+    apply_session_state,
+    save_session_state
+)
 
 logger = setup_logger(__name__)
 
+USERNAME_SELECTORS = ["input[name='username']", "input[type='text']", "input:first-of-type"]
+PASSWORD_SELECTORS = ["input[name='password']", "input[type='password']"]
+# Only shown to a logged-in admin
+LOGGED_IN_SELECTOR = "text='Administration'"
+
+
+def is_logged_in(page, timeout: int = 5000) -> bool:
+    """Return True if the Administration menu shows up within timeout (ms)."""
+    try:
+        page.wait_for_selector(LOGGED_IN_SELECTOR, timeout=timeout)
+        return True
+    except Exception as e:
+        logger.debug("Administration menu not found: %s", e)
+        return False
+
 
 class CSPLoginHandler:
 
-    def __init__(self, nova: NovaAct, screenshot_manager=None):
+    def __init__(
+        self,
+        nova: NovaAct,
+        screenshot_manager=None,
+        session_state_ttl_sec: int = 0,
+        session_state_file: str = DEFAULT_SESSION_STATE_FILE
+    ):
+        """
+        Args:
+            nova: NovaAct instance
+            screenshot_manager: Optional ScreenshotManager
+            session_state_ttl_sec: Reuse a saved login session younger than this
+                (0 disables saving and reusing sessions)
+            session_state_file: Where the login session is saved
+        """
         self.nova = nova
         self.page = nova.page
         self.screenshot_manager = screenshot_manager
+        self.session_state_ttl_sec = session_state_ttl_sec
+        self.session_state_file = session_state_file
+        self._restore_attempted = False
+
+        # Locators are lazy, so build them once and reuse across retries
+        self.username_locators = [(sel, self.page.locator(sel).first) for sel in USERNAME_SELECTORS]
+        self.password_locators = [(sel, self.page.locator(sel).first) for sel in PASSWORD_SELECTORS]
+        self.submit_button = self.page.locator("button[type='submit']").first
 
     def login(self, username: str, password: str) -> bool:
         try:
             logger.info(f"Starting login for user: {username}")
             print(f"🔐 Logging in as: {username}")
 
-            # Wait for page load
-            time.sleep(5)
+            # Reuse a saved session if still valid (only tried on first attempt)
+            if self._restore_session(username):
+                logger.info("Login skipped - saved session is still valid")
+                print("✅ Reused saved login session")
+                return True
+
+            # Wait for login form instead of a fixed page-load sleep
+            wait_for_selector_or_sleep(self.page, "input[type='password']", timeout=15000, fallback_sleep=2)
 
             # Fill username
             if not self._fill_username(username):
                 raise Exception("Failed to fill username")
 
-            time.sleep(0.5)
-
             # Fill password
             if not self._fill_password(password):
                 raise Exception("Failed to fill password")
 
-            time.sleep(0.5)
-
             # Submit
             if not self._submit_login():
                 raise Exception("Failed to submit login")
 
             print("✓ Login submitted")
-            time.sleep(3)
 
-            # Verify success
+            # Verify success (waits for the Administration menu)
             if not self._verify_login():
                 raise Exception("Login verification failed - Administration menu not found")
 
+            if self.session_state_ttl_sec > 0:
+                save_session_state(self.nova, username, self.session_state_file)
+
             # Screenshot on success if manager available
             if self.screenshot_manager:
                 self.screenshot_manager.capture(self.nova, step_name="login_success")
@@ -73,37 +120,49 @@ class CSPLoginHandler:
             print(error_msg)
             raise
 
-    def _fill_username(self, username: str) -> bool:
-        username_selectors = ["input[name='username']", "input[type='text']", "input:first-of-type"]
+    def _restore_session(self, username: str) -> bool:
+        if self._restore_attempted:
+            return False
+        self._restore_attempted = True
+
+        state = load_session_state(username, self.session_state_file, self.session_state_ttl_sec)
+        if not state:
+            return False
+
+        try:
+            apply_session_state(self.nova, state)
+            self.page.wait_for_selector(LOGGED_IN_SELECTOR, timeout=5000)
+            logger.debug("Saved session restored - Administration menu found")
+            return True
+        except Exception as e:
+            logger.info(f"Saved session not usable, logging in: {e}")
+            return False
 
-        for selector in username_selectors:
+    def _fill_username(self, username: str) -> bool:
+        for selector, locator in self.username_locators:
             try:
-                locator = self.page.locator(selector).first
                 if locator.count() > 0:
                     locator.fill(username)
-                    logger.debug(f"Username filled using selector: {selector}")
+                    logger.debug("Username filled using selector: %s", selector)
                     print("✓ Username filled")
                     return True
             except Exception as e:
-                logger.debug(f"Selector {selector} failed: {e}")
+                logger.debug("Selector %s failed: %s", selector, e)
                 continue
 
         logger.error("All username selectors failed")
         return False
 
     def _fill_password(self, password: str) -> bool:
-        password_selectors = ["input[name='password']", "input[type='password']"]
-
-        for selector in password_selectors:
+        for selector, locator in self.password_locators:
             try:
-                locator = self.page.locator(selector).first
                 if locator.count() > 0:
                     locator.fill(password)
-                    logger.debug(f"Password filled using selector: {selector}")
+                    logger.debug("Password filled using selector: %s", selector)
                     print("✓ Password filled")
                     return True
             except Exception as e:
-                logger.debug(f"Selector {selector} failed: {e}")
+                logger.debug("Selector %s failed: %s", selector, e)
                 continue
 
         logger.error("All password selectors failed")
@@ -111,9 +170,8 @@ class CSPLoginHandler:
 
     def _submit_login(self) -> bool:
         try:
-            button = self.page.locator("button[type='submit']").first
-            if button.count() > 0:
-                button.click()
+            if self.submit_button.count() > 0:
+                self.submit_button.click()
                 logger.debug("Login submitted via button")
             else:
                 self.page.keyboard.press("Enter")
@@ -125,7 +183,7 @@ class CSPLoginHandler:
 
     def _verify_login(self) -> bool:
         try:
-            self.page.wait_for_selector("text='Administration'", timeout=5000)
+            self.page.wait_for_selector(LOGGED_IN_SELECTOR, timeout=10000)
             logger.debug("Login verified - Administration menu found")
             return True
         except Exception as e:
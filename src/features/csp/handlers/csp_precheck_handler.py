@@ -0,0 +1,92 @@
+from nova_act import NovaAct
+from typing import List, Optional
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
+
+from shared.logger import setup_logger
+from shared.wait_utils import is_text_absent, ensure_tab_selected
+
+logger = setup_logger(__name__)
+
+
+PRECHECK_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "role_match": {"type": "boolean"},
+        "scope_match": {"type": "boolean"}
+    },
+    "required": ["role_match", "scope_match"]
+}
+
+PRECHECK_PROMPT = (
+    "Look at the FIRST row (top-most) of the Roles table. "
+    "Set role_match to true if its Role field shows '{role}'. "
+    "Set scope_match to true if its Scope field shows the path with '{branch}' "
+    "(like '... / {region} / {branch}' or similar)."
+)
+
+
+class CSPPrecheckHandler:
+
+    def __init__(self, nova: NovaAct):
+        self.nova = nova
+        self.page = nova.page
+        # Locators are lazy and survive navigation, so build them once
+        self.roles_tab = self.page.locator("text='Roles'").first
+
+    def check_current_state(
+        self,
+        new_role: str,
+        branch_hierarchy: List[str],
+        use_page_text: bool = True
+    ) -> Optional[dict]:
+        """
+        Check current Role and Scope of the open edit form in a single act.
+
+        Args:
+            new_role: Requested role
+            branch_hierarchy: Requested [Bank, Region, Branch]
+            use_page_text: Answer "no match" without an act when neither value
+                is on the page (disable when verifying values just set)
+
+        Returns:
+            {'role_match': bool, 'branch_match': bool}, or None if the check
+            could not be performed (callers then fall back to per-field checks)
+        """
+        if not branch_hierarchy or len(branch_hierarchy) < 3:
+            return None
+
+        region, branch = branch_hierarchy[1], branch_hierarchy[2]
+
+        try:
+            logger.debug("Prechecking role '%s' and branch '%s'", new_role, branch)
+            print("  ➤ Checking current role and branch...")
+
+            # Use Playwright for simple tab click (much faster than NovaAct),
+            # skipped when the edit form already shows the Roles tab
+            ensure_tab_selected(self.roles_tab)
+
+            # Neither value on the page: nothing can match, skip the act
+            if use_page_text and is_text_absent(self.page, new_role) and is_text_absent(self.page, branch):
+                state = {'role_match': False, 'branch_match': False}
+                logger.info(f"Precheck result (page text): {state}")
+                return state
+
+            result = self.nova.act_get(
+                PRECHECK_PROMPT.format(role=new_role, region=region, branch=branch),
+                schema=PRECHECK_SCHEMA
+            )
+            parsed = result.parsed_response or {}
+
+            state = {
+                'role_match': bool(parsed.get('role_match')),
+                'branch_match': bool(parsed.get('scope_match'))
+            }
+            logger.info(f"Precheck result: {state}")
+            return state
+
+        except Exception as e:
+            logger.warning(f"Precheck failed, falling back to per-field checks: {e}")
+            return None
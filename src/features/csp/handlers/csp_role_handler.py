@@ -1,24 +1,32 @@
 from nova_act import NovaAct, ActInvalidModelGenerationError, BOOL_SCHEMA
 import sys
 from pathlib import Path
-import time
 
 sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
 
 from shared.logger import setup_logger
 from shared.retry_utils import format_error_for_display
+from shared.wait_utils import wait_for_locator_or_sleep, is_text_absent, ensure_tab_selected
 
 logger = setup_logger(__name__)
 
+# Prompt templates, filled with str.format per call
+ROLE_ALREADY_SET_PROMPT = "Look at the FIRST Role field (top-most row). Does it already show '{role}'?"
+ROLE_OPTION_PROMPT = "In the dropdown list, click on the FIRST visible role option (should be '{role}' after filtering)"
+ROLE_SELECTED_PROMPT = "Look at the FIRST Role field (top-most row). Does it now show '{role}' as the selected value?"
+
 
 class CSPRoleHandler:
 
     def __init__(self, nova: NovaAct):
         self.nova = nova
         self.page = nova.page
+        # Locators are lazy and survive navigation, so build them once
+        self.roles_tab = self.page.locator("text='Roles'").first
+        self.role_listbox = self.page.get_by_role("listbox").first
         self.has_changes = False  # Track if any changes were made
 
-    def change_role(self, new_role: str) -> bool:
+    def change_role(self, new_role: str, check_current: bool = True, verify: bool = True) -> bool:
         try:
             logger.info(f"Changing role to: {new_role}")
             print(f"👤 Changing role to: {new_role}")
@@ -26,68 +34,72 @@ class CSPRoleHandler:
             # Step 0: Navigate to Roles tab
             logger.debug("Step 0: Navigating to Roles tab")
             print("  ➤ Navigating to Roles tab...")
-            # Use Playwright for simple tab click (much faster than NovaAct)
-            roles_tab = self.page.locator("text='Roles'").first
-            roles_tab.click()
-            time.sleep(1)
-
-            # Check if role is already correct
-            logger.debug(f"Checking if role is already set to: {new_role}")
-            print(f"  ➤ Checking current role...")
-            result = self.nova.act_get(
-                f"Look at the FIRST Role field (top-most row). Does it already show '{new_role}'?",
-                schema=BOOL_SCHEMA
-            )
-            if result.parsed_response:
-                logger.info(f"Role already set to: {new_role}. Skipping update.")
-                print(f"  ✓ Role already set to: {new_role}. No changes needed.")
-                self.has_changes = False  # No changes made
-                return True
+            # Use Playwright for simple tab click (much faster than NovaAct),
+            # skipped when the edit form already shows the Roles tab
+            ensure_tab_selected(self.roles_tab)
+
+            # Check if role is already correct (skipped when caller already prechecked
+            # or when the role is not on the page at all)
+            if check_current and not is_text_absent(self.page, new_role):
+                logger.debug("Checking if role is already set to: %s", new_role)
+                print(f"  ➤ Checking current role...")
+                result = self.nova.act_get(
+                    ROLE_ALREADY_SET_PROMPT.format(role=new_role),
+                    schema=BOOL_SCHEMA
+                )
+                if result.parsed_response:
+                    logger.info(f"Role already set to: {new_role}. Skipping update.")
+                    print(f"  ✓ Role already set to: {new_role}. No changes needed.")
+                    self.has_changes = False  # No changes made
+                    return True
 
             # Step 1: Open role dropdown
             logger.debug("Step 1: Opening role dropdown")
             print("  ➤ Opening role dropdown...")
             self.nova.act("In the FIRST Role row (top-most), click the dropdown arrow to open the role selector")
-            time.sleep(1.5)
+            wait_for_locator_or_sleep(self.role_listbox, timeout=3000, fallback_sleep=1.5)
 
             # Step 2: Type role name to filter (Playwright - more reliable for typing)
-            logger.debug(f"Step 2: Typing role name: {new_role}")
+            logger.debug("Step 2: Typing role name: %s", new_role)
             print(f"  ➤ Searching for role: {new_role}...")
 
             self.nova.act("CLick the select search field in the open dropdown")
-            time.sleep(1.5)
 
             # Clear search field first
             self.page.keyboard.press("Control+A")
             self.page.keyboard.press("Backspace")
-            time.sleep(0.3)
 
             # Type role name
             self.page.keyboard.type(new_role, delay=100)  # Type with delay for stability
-            time.sleep(2)
+            # Wait for the filtered option to render (locator, not a selector
+            # string, so labels with extra text or quotes still match)
+            role_option = self.page.get_by_role("option").filter(has_text=new_role).first
+            wait_for_locator_or_sleep(role_option, timeout=3000, fallback_sleep=1)
             print(f"  ✓ Typed '{new_role}'")
 
             # Step 3: Click on the role (should be first/only result after filtering)
-            logger.debug(f"Step 3: Selecting role from filtered list")
+            logger.debug("Step 3: Selecting role from filtered list")
             print(f"  ➤ Clicking on role...")
-            self.nova.act(f"In the dropdown list, click on the FIRST visible role option (should be '{new_role}' after filtering)")
-            time.sleep(1.5)
-
-            # Verify Step 3: Role is selected
-            logger.debug("Verifying role is selected")
-            try:
-                result = self.nova.act_get(
-                    f"Look at the FIRST Role field (top-most row). Does it now show '{new_role}' as the selected value?",
-                    schema=BOOL_SCHEMA
-                )
-                if result.parsed_response:
-                    logger.debug(f"✓ Verification PASSED - Role is selected")
-                    print(f"  ✓ Role '{new_role}' selected successfully")
-                else:
-                    raise Exception(f"Role field should show '{new_role}'")
-            except ActInvalidModelGenerationError as e:
-                logger.error(f"Verification INVALID: {str(e)}")
-                raise Exception(f"Failed to verify role selection: {str(e)}")
+            self.nova.act(ROLE_OPTION_PROMPT.format(role=new_role))
+            # Dropdown closes once the option is applied
+            wait_for_locator_or_sleep(self.role_listbox, state="hidden", timeout=3000, fallback_sleep=1.5)
+
+            # Verify Step 3: Role is selected (skipped when caller verifies all fields at once)
+            if verify:
+                logger.debug("Verifying role is selected")
+                try:
+                    result = self.nova.act_get(
+                        ROLE_SELECTED_PROMPT.format(role=new_role),
+                        schema=BOOL_SCHEMA
+                    )
+                    if result.parsed_response:
+                        logger.debug("✓ Verification PASSED - Role is selected")
+                        print(f"  ✓ Role '{new_role}' selected successfully")
+                    else:
+                        raise Exception(f"Role field should show '{new_role}'")
+                except ActInvalidModelGenerationError as e:
+                    logger.error(f"Verification INVALID: {str(e)}")
+                    raise Exception(f"Failed to verify role selection: {str(e)}")
 
             logger.info(f"Role updated successfully to: {new_role}")
             print(f"✅ Role updated to: {new_role}")
@@ -1,28 +1,45 @@
 from nova_act import NovaAct
+import re
 import sys
 from pathlib import Path
-import time
 
 sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
 
 from shared.logger import setup_logger
 from shared.retry_utils import format_error_for_display
+from shared.wait_utils import act_and_wait_for_response
 
 logger = setup_logger(__name__)
 
+SAVE_METHODS = ("POST", "PUT", "PATCH")
+# User-update endpoint path (".../users/<id>", ".../user?..."); keeps analytics,
+# telemetry or keep-alive posts fired during the click from matching
+SAVE_URL_PATTERN = re.compile(r"/users?(/|\?|$)", re.IGNORECASE)
+
 
 class CSPSaveHandler:
 
-    def __init__(self, nova: NovaAct):
+    def __init__(self, nova: NovaAct, save_url_pattern: re.Pattern = SAVE_URL_PATTERN):
         self.nova = nova
+        self.page = nova.page
+        self.save_url_pattern = save_url_pattern
 
     def save_changes(self) -> bool:
         try:
             logger.info("Saving changes...")
             print("💾 Saving changes...")
 
-            self.nova.act("Click the green 'Save' button")
-            time.sleep(1)
+            # Wait for the save request itself: the SPA is already network-idle
+            # after the click, and navigating away early would cancel the save
+            response = act_and_wait_for_response(
+                self.page,
+                lambda: self.nova.act("Click the green 'Save' button"),
+                self._is_save_response,
+                timeout=15000,
+                fallback_sleep=2
+            )
+            if response is not None and not response.ok:
+                raise Exception(f"Save request failed: HTTP {response.status}")
 
             logger.info("Changes saved successfully")
             print("✅ Changes saved successfully")
@@ -34,6 +51,13 @@ class CSPSaveHandler:
             print(error_msg)
             raise
 
+    def _is_save_response(self, response) -> bool:
+        """True for the user-update request triggered by the Save click."""
+        return (
+            response.request.method in SAVE_METHODS
+            and self.save_url_pattern.search(response.url) is not None
+        )
+
     # def close_modal(self) -> bool:
     #     try:
     #         logger.info("Closing modal...")
@@ -1,5 +1,5 @@
 from nova_act import NovaAct
-import time
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
 import sys
 from pathlib import Path
 
@@ -7,15 +7,40 @@ sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
 
 from shared.logger import setup_logger
 from shared.retry_utils import format_error_for_display
+from shared.wait_utils import wait_for_selector_or_sleep, act_and_wait_for_response
 
 logger = setup_logger(__name__)
 
+SEARCH_FOCUS_LOGIN_PROMPT = (
+    "Click 'More filters' if visible and the Login field is not shown. "
+    "Then click the Login field."
+)
+ROW_ACTIONS_PROMPT = "In the results table, click the Actions dropdown of data row {row} (counting from the top)"
+
+# Resolves to the 1-based row whose cell equals the login (case-insensitive,
+# like the filter check), once every row contains the login (the filter has
+# been applied). Null keeps waiting.
+USER_ROW_JS = """
+login => {
+    const rows = [...document.querySelectorAll('table tbody tr')];
+    const needle = login.toLowerCase();
+    if (!rows.length || !rows.every(r => r.textContent.toLowerCase().includes(needle))) return null;
+    const matches = [];
+    rows.forEach((r, i) => {
+        if ([...r.cells].some(c => c.textContent.trim().toLowerCase() === needle)) matches.push(i + 1);
+    });
+    return matches.length === 1 ? matches[0] : null;
+}
+"""
+
 
 class CSPUserSearchHandler:
 
     def __init__(self, nova: NovaAct):
         self.nova = nova
         self.page = nova.page
+        # Locators are lazy, so build them once and reuse across users
+        self.search_button = self.page.get_by_role("button", name="Search", exact=True)
 
     def search_and_open_edit(self, target_user: str) -> bool:
         """
@@ -31,31 +56,33 @@ class CSPUserSearchHandler:
             logger.info(f"Searching for user: {target_user}")
             print(f"🔍 Searching for user: {target_user}")
 
-            # Expand filters (Nova Act)
-            self.nova.act("Click 'More filters' if visible")
-            time.sleep(0.5)
-
-            # Click Login field (Nova Act)
-            self.nova.act("Click the Login field")
-            time.sleep(0.3)
+            # Expand filters and focus Login field (Nova Act, one call)
+            self.nova.act(SEARCH_FOCUS_LOGIN_PROMPT)
 
             # Clear and type username (Playwright - secure, no username in AI logs)
             self.page.keyboard.press("Control+A")  # Select all
             self.page.keyboard.press("Backspace")  # Select all
             self.page.keyboard.type(target_user)
-            time.sleep(0.3)
-            logger.debug(f"Username typed: {target_user}")
-
-            # Search (Nova Act)
-            self.nova.act("Click the Search button")
-            time.sleep(2)  # Quick wait for search results
-
-            # Open edit form (Nova Act)
-            # self.nova.act("In the results table, click the first row's Actions dropdown and select Edit")
-            self.nova.act("In the results table, click the first row's Actions dropdown")
-            time.sleep(1)
+            logger.debug("Username typed: %s", target_user)
+
+            # Search and wait for its response, then locate the row whose login
+            # matches exactly (the unfiltered list or longer logins such as
+            # 'name2' must not be picked)
+            act_and_wait_for_response(
+                self.page,
+                self._search,
+                lambda r: r.request.resource_type in ("xhr", "fetch"),
+                timeout=10000,
+                fallback_sleep=2
+            )
+            row = self._find_user_row(target_user)
+
+            # Open edit form (Nova Act), targeting the matched row by position
+            # so the username never goes into the AI prompt
+            self.nova.act(ROW_ACTIONS_PROMPT.format(row=row))
+            wait_for_selector_or_sleep(self.page, "text='Edit'", timeout=5000)  # Dropdown menu open
             self.nova.act("In the dropdown menu, click Edit")
-            time.sleep(2)  # Wait for edit form to load
+            wait_for_selector_or_sleep(self.page, "text='Roles'", timeout=10000)  # Edit form loaded
 
             logger.info(f"Edit form opened successfully for {target_user}")
             print(f"✅ Edit form opened for {target_user}")
@@ -66,3 +93,31 @@ class CSPUserSearchHandler:
             error_msg = format_error_for_display(e, context="User Search")
             print(error_msg)
             raise
+
+    def _search(self):
+        """Click Search (Playwright, Nova Act fallback)."""
+        if not self._click_search():
+            self.nova.act("Click the Search button")
+
+    def _find_user_row(self, target_user: str, timeout: int = 10000) -> int:
+        """Wait for the filtered results and return the 1-based row of target_user."""
+        try:
+            handle = self.page.wait_for_function(USER_ROW_JS, arg=target_user, timeout=timeout)
+        except PlaywrightTimeoutError:
+            raise Exception(f"No unique result row with login '{target_user}'")
+
+        row = handle.json_value()
+        if row != 1:
+            logger.info(f"{target_user} is in result row {row}")
+        return row
+
+    def _click_search(self) -> bool:
+        """Click Search directly when exactly one matching button exists."""
+        try:
+            if self.search_button.count() == 1:
+                self.search_button.click()
+                logger.debug("Search clicked via Playwright")
+                return True
+        except Exception as e:
+            logger.debug("Playwright search click failed: %s", e)
+        return False
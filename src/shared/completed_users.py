@@ -0,0 +1,73 @@
+import os
+import time
+import hashlib
+import logging
+from pathlib import Path
+
+from src.shared.json_utils import loads, dumps
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_COMPLETED_USERS_FILE = ".csp_admin_completed.json"
+
+
+def user_fingerprint(url: str, user_config: dict) -> str:
+    """Stable key for one requested change: same URL, user, role and branch."""
+    parts = (
+        url,
+        user_config['target_user'],
+        user_config.get('new_role') or '',
+        '/'.join(user_config.get('branch_hierarchy') or []),
+    )
+    return hashlib.sha256('|'.join(parts).encode('utf-8')).hexdigest()
+
+
+class CompletedUsersCache:
+    """
+    On-disk record of user changes that already succeeded.
+
+    Lets a re-run of the same input skip users finished by a previous run
+    instead of driving the browser again. Only the main process reads and
+    writes the file; entries older than ttl_sec are ignored and dropped.
+
+    Usage:
+        cache = CompletedUsersCache(ttl_sec=86400)
+        key = user_fingerprint(url, user_config)
+        if not cache.is_completed(key):
+            ...
+            cache.mark_completed(key)
+    """
+
+    def __init__(self, ttl_sec: int, path: str = DEFAULT_COMPLETED_USERS_FILE):
+        self.ttl_sec = ttl_sec
+        self.path = Path(path)
+        self._entries = self._load()
+
+    def _load(self) -> dict:
+        if self.ttl_sec <= 0 or not self.path.exists():
+            return {}
+
+        try:
+            entries = loads(self.path.read_bytes())
+        except Exception as e:
+            logger.warning(f"Failed to read completed users: {e}")
+            return {}
+
+        cutoff = time.time() - self.ttl_sec
+        return {key: ts for key, ts in entries.items() if ts >= cutoff}
+
+    def is_completed(self, key: str) -> bool:
+        return key in self._entries
+
+    def mark_completed(self, key: str):
+        """Record key and rewrite the file atomically."""
+        if self.ttl_sec <= 0:
+            return
+
+        self._entries[key] = time.time()
+        try:
+            tmp_path = Path(f"{self.path}.{os.getpid()}.tmp")
+            tmp_path.write_bytes(dumps(self._entries))
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.warning(f"Failed to save completed users: {e}")
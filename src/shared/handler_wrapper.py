@@ -1,5 +1,6 @@
 import logging
 import time
+import random
 from typing import Callable
 
 from src.shared.retry_utils import (
@@ -14,6 +15,14 @@ logger = logging.getLogger(__name__)
 circuit_breaker = NetworkCircuitBreaker(failure_threshold=3, cooldown_seconds=60)
 
 
+class StepFailedError(Exception):
+    """Raised by callers when a step still fails after all retries."""
+
+    def __init__(self, step_name: str, message: str = None):
+        self.step_name = step_name
+        super().__init__(message or f"Step {step_name} failed")
+
+
 class HandlerWrapper:
     def execute_with_retry(
         self,
@@ -58,7 +67,9 @@ class HandlerWrapper:
                 if attempt < max_retries - 1:
                     # Calculate delay based on error type
                     if is_network_error(e):
-                        delay = 5 * (2 ** attempt)  # Exponential: 5s, 10s, 20s, 40s, 80s
+                        # Exponential: 5s, 10s, 20s, 40s, 80s, plus jitter so parallel
+                        # workers hit by the same outage don't retry in lockstep
+                        delay = round(5 * (2 ** attempt) + random.uniform(0, 1), 1)
                     else:
                         delay = 2 * (attempt + 1)   # Linear: 2s, 4s, 6s
 
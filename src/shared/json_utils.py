@@ -0,0 +1,29 @@
+"""JSON helpers backed by orjson when available, stdlib json otherwise."""
+try:
+    import orjson
+
+    JSONDecodeError = orjson.JSONDecodeError
+
+    def loads(data):
+        """Parse JSON from bytes or str."""
+        return orjson.loads(data)
+
+    def dumps(obj, indent: bool = False) -> bytes:
+        """Serialize to UTF-8 JSON bytes (non-ASCII kept as-is)."""
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option)
+
+except ImportError:
+    import json
+
+    JSONDecodeError = json.JSONDecodeError
+
+    def loads(data):
+        """Parse JSON from bytes or str."""
+        return json.loads(data)
+
+    def dumps(obj, indent: bool = False) -> bytes:
+        """Serialize to UTF-8 JSON bytes (non-ASCII kept as-is)."""
+        return json.dumps(obj, indent=2 if indent else None, ensure_ascii=False).encode('utf-8')
@@ -1,8 +1,25 @@
 import logging
+import os
 from pathlib import Path
 from datetime import datetime
 
 
+def _level_from_env(default=logging.INFO) -> int:
+    """Read LOG_LEVEL (name like DEBUG or a number); fall back to default if invalid."""
+    value = os.getenv('LOG_LEVEL', '').strip().upper()
+    if not value:
+        return default
+    if value.isdigit():
+        return int(value)
+
+    level = logging.getLevelName(value)
+    if isinstance(level, int):
+        return level
+
+    logging.getLogger(__name__).warning(f"Invalid LOG_LEVEL {value!r}, using {logging.getLevelName(default)}")
+    return default
+
+
 def setup_logger(
     name: str,
     level=logging.INFO,
@@ -55,8 +72,12 @@ def setup_logger(
 def setup_automation_logger(
     automation_name: str,
     execution_id: str = None,
-    level=logging.DEBUG
+    level=None
 ):
+    # Read level from environment if not specified (DEBUG for troubleshooting)
+    if level is None:
+        level = _level_from_env()
+
     if not execution_id:
         execution_id = datetime.now().strftime('%Y%m%d_%H%M%S')
 
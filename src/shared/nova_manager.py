@@ -1,12 +1,30 @@
 from nova_act import NovaAct
 from typing import Callable, Optional
+from functools import lru_cache
 import os
+import time
+import random
 from pathlib import Path
 from datetime import datetime
 from dotenv import load_dotenv
 load_dotenv()
 
 
+@lru_cache(maxsize=1)
+def get_nova_act_api_key() -> str:
+    """Resolve NOVA_ACT_API_KEY once per process."""
+    api_key = os.getenv('NOVA_ACT_API_KEY')
+    if not api_key:
+        raise ValueError("NOVA_ACT_API_KEY not found in .env file")
+    return api_key
+
+
+# Resource types that can be dropped without changing what the agent sees.
+# Stylesheets are kept on purpose: prompts rely on colours/layout
+# ("purple 'Select' button", "green 'Save' button").
+BLOCKED_RESOURCE_TYPES = frozenset({"image", "media", "font"})
+
+
 class NovaManager:
 
     @staticmethod
@@ -27,7 +45,7 @@ class NovaManager:
 
         # Get API key
         if not api_key:
-            api_key = os.getenv('NOVA_ACT_API_KEY')
+            api_key = get_nova_act_api_key()
 
         # Read headless mode from environment if not specified
         if headless is None:
@@ -71,3 +89,50 @@ class NovaManager:
         print(f"🚀 Creating NovaAct instance ({mode} mode)")
 
         return NovaAct(**nova_config)
+
+    @staticmethod
+    def start_with_retry(
+        create: Callable[[], NovaAct],
+        max_attempts: int = 3,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0
+    ) -> NovaAct:
+        """
+        Create and start a NovaAct session, retrying failed browser starts.
+
+        Each attempt uses a fresh instance from create(). Backoff is exponential
+        with jitter so pool workers starting together don't retry in lockstep.
+        """
+        for attempt in range(1, max_attempts + 1):
+            nova = create()
+            try:
+                nova.start()
+                return nova
+            except Exception as e:
+                try:
+                    nova.stop()
+                except Exception:
+                    pass
+                if attempt == max_attempts:
+                    raise
+
+                delay = min(max_delay, base_delay * 2 ** (attempt - 1)) * (0.5 + random.random())
+                print(f"⚠️ Browser start failed (attempt {attempt}/{max_attempts}): {str(e)[:100]}")
+                print(f"⏳ Waiting {delay:.1f}s before restarting browser...")
+                time.sleep(delay)
+
+    @staticmethod
+    def block_resources(nova: NovaAct, resource_types=BLOCKED_RESOURCE_TYPES):
+        """
+        Abort requests for non-essential resource types on the session's browser context.
+
+        Must be called after nova.start().
+        """
+        def handle_route(route):
+            if route.request.resource_type in resource_types:
+                route.abort()
+            else:
+                route.continue_()
+
+        nova.page.context.route("**/*", handle_route)
+        print(f"🚫 Blocking resources: {', '.join(sorted(resource_types))}")
@@ -0,0 +1,44 @@
+import logging
+from pathlib import Path
+
+from src.shared.json_utils import dumps
+
+logger = logging.getLogger(__name__)
+
+
+class ResultsWriter:
+    """
+    Append-only JSONL writer for per-user results.
+
+    Each result is written as soon as it is available, so a crash mid-run
+    keeps everything processed so far.
+
+    Usage:
+        with ResultsWriter("logs/csp_admin/20250101_120000/results.jsonl") as writer:
+            writer.write({'user': 'a', 'success': True})
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = Path(file_path)
+        self.file_path.parent.mkdir(parents=True, exist_ok=True)
+        self.count = 0
+
+        # Unbuffered: every result hits the file as soon as it is written
+        self._fp = open(self.file_path, 'ab', buffering=0)
+        logger.debug("Writing results to: %s", self.file_path)
+
+    def write(self, result: dict):
+        """Append one result as a JSON line."""
+        self._fp.write(dumps(result) + b'\n')
+        self.count += 1
+
+    def close(self):
+        if not self._fp.closed:
+            self._fp.close()
+            logger.info(f"Saved {self.count} result(s) to: {self.file_path}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,88 @@
+import os
+import time
+import logging
+from pathlib import Path
+from typing import Optional
+
+from nova_act import NovaAct
+
+from src.shared.json_utils import loads, dumps
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SESSION_STATE_FILE = ".csp_admin_state.json"
+
+# Re-applies saved localStorage for the matching origin before page scripts run
+_LOCAL_STORAGE_SCRIPT = """
+(origins) => {
+    const entry = origins.find(o => o.origin === window.location.origin);
+    if (!entry) return;
+    for (const item of entry.localStorage) {
+        window.localStorage.setItem(item.name, item.value);
+    }
+}
+"""
+
+
+def save_session_state(nova: NovaAct, username: str, path: str = DEFAULT_SESSION_STATE_FILE) -> bool:
+    """
+    Save cookies + localStorage of the current browser context for username.
+
+    Written atomically so concurrent workers never read a partial file, and
+    owner-only (0600) since it holds live admin session cookies.
+    """
+    try:
+        state = nova.page.context.storage_state()
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(dumps({'username': username, 'state': state}))
+        os.replace(tmp_path, path)
+        logger.info(f"Session state saved: {path}")
+        return True
+    except Exception as e:
+        logger.warning(f"Failed to save session state: {e}")
+        return False
+
+
+def load_session_state(username: str, path: str = DEFAULT_SESSION_STATE_FILE, max_age_sec: int = 0) -> Optional[dict]:
+    """
+    Load saved storage state for username if it exists and is younger than max_age_sec.
+
+    Returns:
+        Playwright storage state dict, or None if missing/expired/other user
+    """
+    if max_age_sec <= 0:
+        return None
+
+    state_file = Path(path)
+    if not state_file.exists():
+        return None
+
+    age = time.time() - state_file.stat().st_mtime
+    if age > max_age_sec:
+        logger.info(f"Session state expired ({age:.0f}s old)")
+        return None
+
+    try:
+        data = loads(state_file.read_bytes())
+    except Exception as e:
+        logger.warning(f"Failed to read session state: {e}")
+        return None
+
+    if data.get('username') != username:
+        return None
+
+    return data.get('state')
+
+
+def apply_session_state(nova: NovaAct, state: dict):
+    """Apply a saved storage state to a started NovaAct session and reload the page."""
+    context = nova.page.context
+    context.add_cookies(state.get('cookies', []))
+
+    origins = state.get('origins', [])
+    if origins:
+        context.add_init_script(script=f"({_LOCAL_STORAGE_SCRIPT})({dumps(origins).decode('utf-8')})")
+
+    nova.page.reload()
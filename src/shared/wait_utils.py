@@ -0,0 +1,177 @@
+import time
+import logging
+from typing import Callable, Optional
+
+from playwright.sync_api import Page, Locator, Response, TimeoutError as PlaywrightTimeoutError
+
+logger = logging.getLogger(__name__)
+
+# True if any input/textarea value contains the text (case-insensitive)
+INPUT_VALUE_CONTAINS_JS = """
+text => {
+    const needle = text.toLowerCase();
+    return [...document.querySelectorAll('input, textarea')].some(
+        el => (el.value || '').toLowerCase().includes(needle)
+    );
+}
+"""
+
+
+def wait_for_selector_or_sleep(
+    page: Page,
+    selector: str,
+    timeout: int = 5000,
+    fallback_sleep: float = 1.0,
+    state: str = "visible"
+) -> bool:
+    """
+    Wait until selector reaches state, falling back to a fixed sleep on timeout.
+
+    Returns:
+        True if the selector condition was met, False if fell back to sleep
+    """
+    try:
+        page.wait_for_selector(selector, state=state, timeout=timeout)
+        return True
+    except PlaywrightTimeoutError:
+        logger.debug("Timed out waiting for %s (%s), sleeping %ss", selector, state, fallback_sleep)
+        time.sleep(fallback_sleep)
+        return False
+
+
+def wait_for_locator_or_sleep(
+    locator: Locator,
+    state: str = "visible",
+    timeout: int = 5000,
+    fallback_sleep: float = 1.0
+) -> bool:
+    """
+    Wait until locator reaches state, falling back to a fixed sleep on timeout.
+
+    Unlike a selector string, a locator built with get_by_role/get_by_text is
+    safe for values containing quotes.
+
+    Returns:
+        True if the locator condition was met, False if fell back to sleep
+    """
+    try:
+        locator.wait_for(state=state, timeout=timeout)
+        return True
+    except PlaywrightTimeoutError:
+        logger.debug("Timed out waiting for %s (%s), sleeping %ss", locator, state, fallback_sleep)
+        time.sleep(fallback_sleep)
+        return False
+
+
+def wait_for_function_or_sleep(
+    page: Page,
+    expression: str,
+    arg=None,
+    timeout: int = 5000,
+    fallback_sleep: float = 1.0
+) -> bool:
+    """
+    Wait until a JS expression returns truthy, falling back to a fixed sleep on timeout.
+
+    Returns:
+        True if the condition was met, False if fell back to sleep
+    """
+    try:
+        page.wait_for_function(expression, arg=arg, timeout=timeout)
+        return True
+    except PlaywrightTimeoutError:
+        logger.debug("Timed out waiting for page condition, sleeping %ss", fallback_sleep)
+        time.sleep(fallback_sleep)
+        return False
+
+
+def act_and_wait_for_response(
+    page: Page,
+    action: Callable[[], object],
+    predicate: Callable[[Response], bool],
+    timeout: int = 10000,
+    fallback_sleep: float = 1.0
+) -> Optional[Response]:
+    """
+    Run action and wait for the first response matching predicate.
+
+    Use for clicks inside the single-page app, where networkidle has already
+    been reached and returns immediately. Errors raised by action itself are
+    not swallowed.
+
+    Returns:
+        The matching Response, or None if none arrived in time (fell back to sleep)
+    """
+    acted = False
+    try:
+        with page.expect_response(predicate, timeout=timeout) as response_info:
+            action()
+            acted = True
+        return response_info.value
+    except PlaywrightTimeoutError:
+        if not acted:
+            raise
+        logger.debug("Timed out waiting for response, sleeping %ss", fallback_sleep)
+        time.sleep(fallback_sleep)
+        return None
+
+
+def is_text_absent(page: Page, text: str) -> bool:
+    """
+    Check whether text appears nowhere on the page (case-insensitive substring).
+
+    Looks at rendered text and at input/textarea values, since fields such as
+    Role and Scope are textboxes whose value get_by_text does not see.
+
+    Used to skip an LLM check whose answer can only be "no" when the value is
+    not on the page at all. Query errors count as "present" so callers fall
+    back to the LLM check.
+    """
+    try:
+        if page.get_by_text(text).count():
+            return False
+        return not page.evaluate(INPUT_VALUE_CONTAINS_JS, text)
+    except Exception as e:
+        logger.debug("Text lookup for '%s' failed: %s", text, e)
+        return False
+
+
+def ensure_tab_selected(tab: Locator, settle_sleep: float = 1.0, timeout: int = 3000) -> bool:
+    """
+    Click tab unless the page already marks it as the selected tab.
+
+    tab may point at the tab's label; selection is read from the closest
+    [role=tab] ancestor's aria-selected. After the click, waits for that
+    attribute to flip to "true" instead of sleeping. If the state cannot be
+    read, the tab is clicked and settle_sleep is used as before.
+
+    Returns:
+        True if the tab was clicked, False if it was already selected
+    """
+    try:
+        selected = tab.evaluate(
+            "el => el.closest('[role=tab]')?.getAttribute('aria-selected')",
+            timeout=1000
+        )
+        if selected == "true":
+            return False
+    except Exception as e:
+        logger.debug("Could not read tab state: %s", e)
+        selected = None
+
+    tab.click()
+
+    if selected is None:
+        time.sleep(settle_sleep)
+        return True
+
+    try:
+        tab.page.wait_for_function(
+            "el => el.closest('[role=tab]')?.getAttribute('aria-selected') === 'true'",
+            arg=tab.element_handle(timeout=1000),
+            timeout=timeout
+        )
+    except Exception as e:
+        logger.debug("Tab did not report selected, sleeping %ss: %s", settle_sleep, e)
+        time.sleep(settle_sleep)
+    return True
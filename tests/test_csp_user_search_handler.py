@@ -0,0 +1,43 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+pytest.importorskip("nova_act")
+sync_api = pytest.importorskip("playwright.sync_api")
+
+from src.features.csp.handlers.csp_user_search_handler import USER_ROW_JS
+
+RESULTS_TABLE = """
+<table><tbody>
+  <tr><td>{first}</td><td>Active</td></tr>
+  <tr><td>{second}</td><td>Active</td></tr>
+</tbody></table>
+"""
+
+
+@pytest.fixture(scope="module")
+def page():
+    with sync_api.sync_playwright() as p:
+        browser = p.chromium.launch()
+        yield browser.new_page()
+        browser.close()
+
+
+def _user_row(page, first, second, login):
+    page.set_content(RESULTS_TABLE.format(first=first, second=second))
+    return page.evaluate(USER_ROW_JS, login)
+
+
+def test_exact_login_row_is_found(page):
+    assert _user_row(page, "hang.maithuy2", "hang.maithuy", "hang.maithuy") == 2
+
+
+def test_mixed_case_login_matches(page):
+    assert _user_row(page, "Hang.MaiThuy", "hang.maithuy2", "hang.maithuy") == 1
+
+
+def test_unfiltered_list_keeps_waiting(page):
+    assert _user_row(page, "hang.maithuy", "other.user", "hang.maithuy") is None
@@ -164,7 +164,7 @@ def run_automation_background(input_path):
         automation_status['logs'].append('📂 Đang tải cấu hình...')
 
         # Run automation
-        success = csp_main(input_file=input_path)
+        success = csp_main(input_file=input_path, auto_continue=True)
 
         automation_status['success'] = success
 